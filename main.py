@@ -9,16 +9,17 @@ processes them using AI, and integrates with ERPNext for contract management.
 
 import os
 import time
+import heapq
+import asyncio
 import logging
-import schedule
+from functools import lru_cache
 from dotenv import load_dotenv
 
 from src.google_drive.monitor import GoogleDriveMonitor
 from src.document_processing.processor import DocumentProcessor
 from src.client_mapping.mapper import ClientMapper
-from src.erpnext_integration.api import ERPNextAPI
 from src.alert_system.alerts import AlertSystem
-from src.utils.config import Config
+from src.utils.singletons import get_config, get_erpnext_api
 
 # Load environment variables
 load_dotenv()
@@ -34,20 +35,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger("contract_agent")
 
-def process_documents():
+@lru_cache(maxsize=1)
+def get_components():
+    """Create the pipeline components once so they live for the process lifetime"""
+    drive_monitor = GoogleDriveMonitor()
+    try:
+        return (
+            drive_monitor,
+            DocumentProcessor(),
+            ClientMapper(),
+            get_erpnext_api(),
+            AlertSystem()
+        )
+    except Exception:
+        # Failures are not cached, so the next cycle builds a new monitor;
+        # release this one's processed-ID store first
+        drive_monitor.close()
+        raise
+
+async def process_documents():
     """Main processing function that runs at scheduled intervals"""
     try:
         logger.info("Starting document processing cycle")
         
-        # Initialize components
-        drive_monitor = GoogleDriveMonitor()
-        document_processor = DocumentProcessor()
-        client_mapper = ClientMapper()
-        erpnext_api = ERPNextAPI()
-        alert_system = AlertSystem()
+        # Get the shared components
+        drive_monitor, document_processor, client_mapper, erpnext_api, alert_system = get_components()
         
         # Get new documents from Google Drive
-        new_documents = drive_monitor.get_new_documents()
+        new_documents = await asyncio.to_thread(drive_monitor.get_new_documents)
         
         if not new_documents:
             logger.info("No new documents found")
@@ -55,76 +70,123 @@ def process_documents():
         
         logger.info(f"Found {len(new_documents)} new documents")
         
-        # Process each document
-        for doc in new_documents:
-            try:
-                # Download document
-                local_path = drive_monitor.download_document(doc)
-                
-                # Process document to extract information
-                try:
-                    extraction_result = document_processor.process_document(local_path)
-                except Exception as e:
-                    logger.error(f"Error processing document {doc.get('name', 'unknown')}: {str(e)}")
-                    alert_system.send_error_alert(doc, str(e))
-                    # Mark as processed to avoid endless retries
-                    drive_monitor.mark_as_processed(doc)
-                    continue
-                
-                # Map client to existing clients or create new
-                client_mapping_result = client_mapper.map_client(extraction_result["client_info"])
-                
-                # Create/update records in ERPNext
+        # Download all new documents in parallel
+        local_paths = await asyncio.to_thread(drive_monitor.download_documents, new_documents)
+        
+        # The monitor's processed-ID store is shared, so updates are serialized
+        drive_lock = asyncio.Lock()
+        
+        async def _process_one(doc, local_path, sem):
+            """Run the extract -> map -> ERPNext -> alert pipeline for one downloaded document"""
+            async with sem:
                 try:
-                    erpnext_record = erpnext_api.update_records(
-                        extraction_result,
-                        client_mapping_result,
-                        local_path
+                    if local_path is None:
+                        # Not marked as processed, so the download is retried next cycle
+                        alert_system.send_error_alert(doc, "Document download failed")
+                        return
+                    
+                    # Process document to extract information
+                    try:
+                        extraction_result = await document_processor.process_document_async(local_path)
+                    except Exception as e:
+                        logger.error(f"Error processing document {doc.get('name', 'unknown')}: {str(e)}")
+                        alert_system.send_error_alert(doc, str(e))
+                        # Mark as processed to avoid endless retries
+                        async with drive_lock:
+                            drive_monitor.mark_as_processed(doc)
+                        return
+                    
+                    # Map client to existing clients or create new
+                    client_mapping_result = await asyncio.to_thread(
+                        client_mapper.map_client, extraction_result["client_info"]
                     )
                     
-                    # Generate necessary alerts
-                    alert_system.generate_alerts(erpnext_record)
-                except Exception as e:
-                    logger.error(f"Error updating ERPNext records: {str(e)}")
-                    alert_system.send_error_alert(doc, f"Document processed but ERPNext update failed: {str(e)}")
-                
-                # Mark document as processed
-                drive_monitor.mark_as_processed(doc)
-                
-                logger.info(f"Successfully processed document: {doc['name']}")
+                    # Create/update records in ERPNext
+                    try:
+                        erpnext_record = await erpnext_api.update_records_async(
+                            extraction_result,
+                            client_mapping_result,
+                            local_path
+                        )
+                        
+                        # Generate necessary alerts
+                        await asyncio.to_thread(alert_system.generate_alerts, erpnext_record)
+                    except Exception as e:
+                        logger.error(f"Error updating ERPNext records: {str(e)}")
+                        alert_system.send_error_alert(doc, f"Document processed but ERPNext update failed: {str(e)}")
+                    
+                    # Mark document as processed
+                    async with drive_lock:
+                        drive_monitor.mark_as_processed(doc)
+                    
+                    logger.info(f"Successfully processed document: {doc['name']}")
                 
-            except Exception as e:
-                logger.error(f"Error processing document {doc.get('name', 'unknown')}: {str(e)}")
-                alert_system.send_error_alert(doc, str(e))
-                continue
+                except Exception as e:
+                    logger.error(f"Error processing document {doc.get('name', 'unknown')}: {str(e)}")
+                    alert_system.send_error_alert(doc, str(e))
         
-        # Generate expiration alerts for existing contracts
-        try:
-            alert_system.check_contract_expirations()
-        except Exception as e:
-            logger.error(f"Error checking contract expirations: {str(e)}")
+        # Process documents concurrently, bounded by MAX_CONCURRENCY
+        sem = asyncio.Semaphore(int(os.getenv("MAX_CONCURRENCY", 16)))
+        async with asyncio.TaskGroup() as tg:
+            for doc, local_path in zip(new_documents, local_paths):
+                tg.create_task(_process_one(doc, local_path, sem))
+        
+        # Send any alerts still queued by the document tasks
+        await asyncio.to_thread(alert_system.flush_alerts)
         
     except Exception as e:
         logger.error(f"Error in processing cycle: {str(e)}")
 
+async def check_expirations():
+    """Generate expiration alerts for existing contracts"""
+    try:
+        alert_system = get_components()[4]
+        await asyncio.to_thread(alert_system.check_contract_expirations)
+    except Exception as e:
+        logger.error(f"Error checking contract expirations: {str(e)}")
+
+async def run_scheduler(jobs):
+    """
+    Run periodic jobs, one at a time, sleeping until the next deadline
+    
+    Deadlines are kept in a heap, so the loop wakes up once per job run
+    instead of polling. Jobs are rescheduled from their planned start time,
+    so intervals do not drift by the time the job itself takes.
+    
+    Args:
+        jobs (list): (interval_seconds, coroutine_function) pairs; each job
+            runs immediately and then every interval_seconds
+    """
+    now = time.monotonic()
+    heap = [(now, i, interval, job) for i, (interval, job) in enumerate(jobs)]
+    heapq.heapify(heap)
+    
+    while heap:
+        next_run, i, interval, job = heapq.heappop(heap)
+        delay = next_run - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        await job()
+        
+        # If the job overran its interval, run it again as soon as possible
+        next_run = max(next_run + interval, time.monotonic())
+        heapq.heappush(heap, (next_run, i, interval, job))
+
 def main():
     """Main entry point"""
     logger.info("Contract Intelligence Agent starting")
     
     # Load configuration
-    config = Config()
+    config = get_config()
     processing_interval = int(os.getenv("PROCESSING_INTERVAL", 300))  # 5 minutes by default
+    expiration_check_interval = int(os.getenv("EXPIRATION_CHECK_INTERVAL", 86400))  # daily by default
     
-    # Run once at startup
-    process_documents()
-    
-    # Schedule regular processing
-    schedule.every(processing_interval).seconds.do(process_documents)
-    
-    # Run scheduled tasks
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+    # Run each job once at startup, then at its interval
+    asyncio.run(run_scheduler([
+        (processing_interval, process_documents),
+        (expiration_check_interval, check_expirations)
+    ]))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
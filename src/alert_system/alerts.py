@@ -6,35 +6,66 @@ processing errors, and other notifications.
 """
 
 import os
+import atexit
+import bisect
 import logging
 import json
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 
-from src.utils.config import Config
-from src.utils.helpers import ensure_directory_exists, save_json
-from src.erpnext_integration.api import ERPNextAPI
+from src.utils.helpers import ensure_directory_exists, to_json_line
+from src.utils.singletons import get_config, get_erpnext_api
+from src.utils import cache
 
 # Logger setup
 logger = logging.getLogger("contract_agent.alert_system")
 
+# Alert priorities, from the most to the least urgent
+ALERT_PRIORITIES = ("high", "medium", "low")
+
+# How long a sent expiration alert suppresses repeats for the same contract and period
+ALERT_DEDUPE_TTL = 86400
+
+# Maximum number of alerts sent to ERPNext in a single insert_many request
+ALERT_BATCH_SIZE = 100
+
+# Flushes an alert is attempted in before it is dropped and its dedupe key released
+ALERT_SEND_ATTEMPTS = 3
+
 class AlertSystem:
     """Generate alerts for contract management"""
     
     def __init__(self):
         """Initialize the alert system with configuration"""
-        self.config = Config()
-        self.erpnext_api = ERPNextAPI()
+        self.config = get_config()
+        self.erpnext_api = get_erpnext_api()
         
-        # Alert periods (days before expiration)
-        self.alert_periods = self.config.alert_periods
+        # Alert periods (days before expiration), closest first
+        self.alert_periods = sorted(self.config.alert_periods)
+        
+        # Upper bounds (in days) of each priority band, resolved with bisect
+        self._priority_thresholds = self.config.alert_priority_thresholds
         
         # Directory to store alert logs
         self.log_dir = os.path.join(os.getcwd(), "alert_logs")
         ensure_directory_exists(self.log_dir)
+        
+        # Open alert log files, keyed by alert type -> (date, file handle)
+        self._log_handles = {}
+        self._log_lock = threading.Lock()
+        atexit.register(self._close_handles)
+        
+        # Alerts waiting to be sent to ERPNext by flush_alerts: (alert_data, dedupe_key, attempts)
+        self._pending_alerts = []
+        self._pending_lock = threading.Lock()
     
-    def _create_alert_record(self, alert_type, contract_id, client_id, message, priority="medium", days_until_expiration=None):
+    def _create_alert_record(self, alert_type, contract_id, client_id, message, priority="medium", days_until_expiration=None, now=None, dedupe_key=None):
         """
-        Create an alert record in ERPNext
+        Queue an alert record for creation in ERPNext
+        
+        The record is sent on the next flush_alerts() call, batched with
+        any other pending alerts.
         
         Args:
             alert_type (str): Type of alert (expiration, missing_info, processing_error)
@@ -43,90 +74,166 @@ class AlertSystem:
             message (str): Alert message
             priority (str): Alert priority (high, medium, low)
             days_until_expiration (int, optional): Days until contract expiration
+            now (datetime, optional): Current time, if the caller already has it
+            dedupe_key (str, optional): Cache key claimed for this alert; released
+                if the alert cannot be sent
             
         Returns:
-            dict: Created alert record or None if failed
+            dict: Queued alert record
         """
-        try:
-            # Create alert data
-            alert_data = {
-                "doctype": "Alert",
-                "alert_type": alert_type,
-                "contract_id": contract_id,
-                "client_id": client_id,
-                "alert_message": message,
-                "days_until_expiration": days_until_expiration,
-                "priority": priority,
-                "status": "pending",
-                "created_date": datetime.now().strftime("%Y-%m-%d")
-            }
-            
-            # Create the alert in ERPNext
-            response = self.erpnext_api._make_request("POST", "Alert", data=alert_data)
-            
-            logger.info(f"Created {priority} priority {alert_type} alert for contract {contract_id}")
+        now = now or datetime.now()
+        
+        # Create alert data
+        alert_data = {
+            "doctype": "Alert",
+            "alert_type": alert_type,
+            "contract_id": contract_id,
+            "client_id": client_id,
+            "alert_message": message,
+            "days_until_expiration": days_until_expiration,
+            "priority": priority,
+            "status": "pending",
+            "created_date": now.date().isoformat()
+        }
+        
+        with self._pending_lock:
+            self._pending_alerts.append((alert_data, dedupe_key, 0))
+        
+        logger.info(f"Queued {priority} priority {alert_type} alert for contract {contract_id}")
+        
+        return {
+            "contract_id": contract_id,
+            "client_id": client_id,
+            "alert_type": alert_type,
+            "status": "pending"
+        }
+    
+    def flush_alerts(self):
+        """
+        Create all queued alert records in ERPNext
+        
+        Alerts are sent in batches of ALERT_BATCH_SIZE through insert_many,
+        so N alerts cost ceil(N / ALERT_BATCH_SIZE) requests instead of N.
+        A failed batch is queued again for the next flush; after
+        ALERT_SEND_ATTEMPTS failures its alerts are dropped and their dedupe
+        keys released, so a later expiration check can alert again.
+        
+        Returns:
+            list: Names of the created alerts, in queue order
+        """
+        with self._pending_lock:
+            pending, self._pending_alerts = self._pending_alerts, []
+        
+        alert_ids = []
+        failed = []
+        for start in range(0, len(pending), ALERT_BATCH_SIZE):
+            batch = pending[start:start + ALERT_BATCH_SIZE]
+            try:
+                alert_ids.extend(self.erpnext_api.insert_many([alert_data for alert_data, _, _ in batch]))
+                logger.info(f"Created {len(batch)} alert records in ERPNext")
+            except Exception as e:
+                logger.error(f"Error creating {len(batch)} alert records in ERPNext: {str(e)}")
+                failed.extend((alert_data, key, attempts + 1) for alert_data, key, attempts in batch)
+        
+        retry = [item for item in failed if item[2] < ALERT_SEND_ATTEMPTS]
+        dropped = [item for item in failed if item[2] >= ALERT_SEND_ATTEMPTS]
+        if retry:
+            with self._pending_lock:
+                self._pending_alerts[:0] = retry
+        if dropped:
+            logger.error(f"Dropped {len(dropped)} alerts after {ALERT_SEND_ATTEMPTS} failed attempts")
+            dropped_keys = [key for _, key, _ in dropped if key]
+            if dropped_keys:
+                cache.delete(*dropped_keys)
+        
+        # Alerts are logged as they are queued; make the log lines durable too
+        self._flush_handles()
+        
+        return alert_ids
+    
+    def _log_alert(self, alert_type, data, now=None):
+        """Append alert information to the alert type's JSONL log for today"""
+        today = (now or datetime.now()).date().isoformat()
+        line = to_json_line(data)
+        
+        with self._log_lock:
+            log_date, handle = self._log_handles.get(alert_type, (None, None))
             
-            # Return the created alert
-            return {
-                "alert_id": response.get("data", {}).get("name"),
-                "contract_id": contract_id,
-                "client_id": client_id,
-                "alert_type": alert_type,
-                "status": "pending"
-            }
+            # Rotate to a new file when the day changes
+            if log_date != today:
+                if handle is not None:
+                    handle.close()
+                log_path = os.path.join(self.log_dir, f"alerts-{alert_type}-{today}.jsonl")
+                handle = open(log_path, "a", buffering=1 << 16)
+                self._log_handles[alert_type] = (today, handle)
             
-        except Exception as e:
-            logger.error(f"Error creating alert record in ERPNext: {str(e)}")
-            return None
+            handle.write(line)
+        
+        logger.info(f"Alert logged to {handle.name}")
     
-    def _log_alert(self, alert_type, data):
-        """Log alert information to file"""
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        log_path = os.path.join(
-            self.log_dir, 
-            f"{alert_type}_{timestamp}.json"
-        )
-        save_json(data, log_path)
-        logger.info(f"Alert logged to {log_path}")
+    def _flush_handles(self):
+        """Flush buffered alert log lines to disk"""
+        with self._log_lock:
+            for _, handle in self._log_handles.values():
+                handle.flush()
+    
+    def _close_handles(self):
+        """Close all open alert log files"""
+        with self._log_lock:
+            for _, handle in self._log_handles.values():
+                handle.close()
+            self._log_handles.clear()
     
-    def generate_expiration_alert(self, contract, days_until_expiration):
+    def generate_expiration_alert(self, contract, days_until_expiration, alert_period=None, now=None):
         """
         Generate an alert for an expiring contract
         
+        Only one alert is sent per contract and alert period within
+        ALERT_DEDUPE_TTL, however often the contract is seen.
+        
         Args:
             contract (dict): Contract data
             days_until_expiration (int): Days until expiration
+            alert_period (int, optional): Alert period that triggered the alert;
+                defaults to days_until_expiration
+            now (datetime, optional): Current time, if the caller already has it
         """
+        now = now or datetime.now()
+        
         contract_id = contract["contract_id"]
+        if alert_period is None:
+            alert_period = days_until_expiration
+        
+        # Skip contracts already alerted for this period; the key is released if sending fails
+        dedupe_key = f"alert:sent:{contract_id}:{alert_period}"
+        if not cache.add(dedupe_key, 1, ttl=ALERT_DEDUPE_TTL):
+            logger.debug(f"Expiration alert for contract {contract_id} ({alert_period} days) already sent")
+            return
+        
         client_id = contract["client_id"]
         contract_name = contract["contract_name"]
         contract_type = contract["contract_type"]
         expiration_date = contract["expiration_date"]
         
         # Determine priority based on days until expiration
-        if days_until_expiration <= 30:
-            priority = "high"
-        elif days_until_expiration <= 60:
-            priority = "medium"
-        else:
-            priority = "low"
+        band = bisect.bisect_left(self._priority_thresholds, days_until_expiration)
+        priority = ALERT_PRIORITIES[min(band, len(ALERT_PRIORITIES) - 1)]
         
         # Create alert message
         message = f"Contract {contract_name} ({contract_type}) will expire in {days_until_expiration} days on {expiration_date}."
         
         # Create alert record
-        alert = self._create_alert_record(
+        self._create_alert_record(
             "expiration", 
             contract_id, 
             client_id, 
             message, 
             priority, 
-            days_until_expiration
+            days_until_expiration,
+            now=now,
+            dedupe_key=dedupe_key
         )
         
-        if not alert:
-            return
-        
         # Log the alert
         self._log_alert("expiration", {
             "contract_id": contract_id,
@@ -135,8 +242,8 @@ class AlertSystem:
             "days_until_expiration": days_until_expiration,
             "message": message,
             "priority": priority,
-            "timestamp": datetime.now().isoformat()
-        })
+            "timestamp": now
+        }, now=now)
         
         logger.info(f"Generated expiration alert for contract {contract_name} - {days_until_expiration} days remaining")
     
@@ -154,11 +261,12 @@ class AlertSystem:
         message = f"Error processing document {document_name}: {error_message}"
         
         # Log the alert
+        now = datetime.now()
         self._log_alert("processing_error", {
             "document_name": document_name,
             "error_message": error_message,
-            "timestamp": datetime.now().isoformat()
-        })
+            "timestamp": now
+        }, now=now)
         
         logger.info(f"Logged processing error for document {document_name}")
     
@@ -182,15 +290,17 @@ class AlertSystem:
                 }
                 
                 # Parse the expiration date
-                expiration_date = datetime.strptime(erpnext_record["expiration_date"], "%Y-%m-%d").date()
-                today = datetime.now().date()
-                days_until_expiration = (expiration_date - today).days
+                now = datetime.now()
+                expiration_date = date.fromisoformat(erpnext_record["expiration_date"])
+                days_until_expiration = (expiration_date - now.date()).days
                 
                 # Generate expiration alerts if needed
                 for alert_period in self.alert_periods:
                     if days_until_expiration <= alert_period:
-                        self.generate_expiration_alert(contract, days_until_expiration)
+                        self.generate_expiration_alert(contract, days_until_expiration, alert_period, now=now)
                         break  # Only generate one alert for the closest period
+                
+                self.flush_alerts()
             
         except Exception as e:
             logger.error(f"Error generating alerts: {str(e)}")
@@ -198,25 +308,28 @@ class AlertSystem:
     def check_contract_expirations(self):
         """Check for contracts that will expire soon and generate alerts"""
         try:
+            # Get contracts expiring exactly at each period
+            # This ensures we only generate alerts once per period
+            now = datetime.now()
+            today = now.date()
+            target_dates = [today + timedelta(days=days_ahead) for days_ahead in self.alert_periods]
+            
+            # Query every alert period at once; the queries are independent
+            with ThreadPoolExecutor(max_workers=max(1, len(self.alert_periods))) as executor:
+                results = list(executor.map(self.erpnext_api.get_contracts_expiring_on, target_dates))
+            
             # Check each alert period
-            for days_ahead in self.alert_periods:
-                # Get contracts expiring exactly at this period
-                # This ensures we only generate alerts once per period
-                today = datetime.now().date()
-                target_date = today + timedelta(days=days_ahead)
-                
-                # Get contracts expiring on the target date
-                expiring_contracts = self.erpnext_api.get_expiring_contracts(days_ahead)
-                
-                # Filter to only those expiring exactly on the target date
+            for days_ahead, expiring_contracts in zip(self.alert_periods, results):
                 for contract in expiring_contracts:
-                    if contract.get("days_until_expiration") == days_ahead:
-                        self.generate_expiration_alert(contract, days_ahead)
+                    self.generate_expiration_alert(contract, days_ahead, days_ahead, now=now)
+            
+            self.flush_alerts()
             
         except Exception as e:
             logger.error(f"Error checking contract expirations: {str(e)}")
             # Log a system error alert
+            now = datetime.now()
             self._log_alert("system_error", {
                 "error_message": f"Error checking contract expirations: {str(e)}",
-                "timestamp": datetime.now().isoformat()
-            }) 
\ No newline at end of file
+                "timestamp": now
+            }, now=now) 
\ No newline at end of file
@@ -7,15 +7,15 @@ using fuzzy matching to handle variations in client names.
 
 import logging
 import json
-from datetime import datetime
 import os
 from colorama import Fore, Style, init
 
-from fuzzywuzzy import fuzz, process
+import numpy as np
+from rapidfuzz import fuzz, process
 
-from src.utils.config import Config
-from src.utils.helpers import save_json, ensure_directory_exists
-from src.erpnext_integration.api import ERPNextAPI
+from src.utils.helpers import save_json, ensure_directory_exists, unique_timestamp, normalize_client_name
+from src.utils import cache
+from src.utils.singletons import get_config, get_erpnext_api
 
 # Initialize colorama
 init()
@@ -23,73 +23,96 @@ init()
 # Logger setup
 logger = logging.getLogger("contract_agent.client_mapping")
 
+# Fuzzy scores below this are not worth computing; the scorer bails out early
+MIN_MATCH_SCORE = 50
+
+# Seconds the shared client list is reused; create_client also invalidates it
+CLIENTS_CACHE_TTL = 300
+
 class ClientMapper:
     """Map extracted client names to existing client records"""
     
     def __init__(self):
         """Initialize the client mapper with configuration"""
-        self.config = Config()
-        self.erpnext_api = ERPNextAPI()
+        self.config = get_config()
+        self.erpnext_api = get_erpnext_api()
         
         # Directory to store mapping results
         self.results_dir = os.path.join(os.getcwd(), "client_mapping_results")
         ensure_directory_exists(self.results_dir)
-        
-        # Cache for client list to avoid frequent API calls
-        self.client_cache = None
-        self.client_cache_timestamp = None
-        self.cache_ttl = 3600  # 1 hour in seconds
     
-    def _get_clients(self):
-        """Get the list of existing clients, with caching"""
-        current_time = datetime.now().timestamp()
+    def _get_match_index(self):
+        """
+        Get the existing clients prepared for matching
         
-        # If cache exists and is recent, use it
-        if (self.client_cache is not None and 
-            self.client_cache_timestamp is not None and 
-            current_time - self.client_cache_timestamp < self.cache_ttl):
-            logger.debug(f"{Fore.BLUE}Using cached client list{Style.RESET_ALL}")
-            return self.client_cache
+        The shared cache is the only cache, so a client created by any
+        document (which invalidates it) is visible to the next lookup.
         
-        # Otherwise, fetch from ERPNext
+        Returns:
+            dict: Match index (see _build_match_index)
+        """
+        clients = cache.get_json(cache.CLIENTS_KEY)
+        if clients is not None:
+            logger.debug(f"{Fore.BLUE}Using client list from shared cache{Style.RESET_ALL}")
+            index = cache.get_json(cache.CLIENTS_INDEX_KEY)
+            if index is not None and len(index["normalized_names"]) == len(clients):
+                return dict(index, clients=clients, client_offsets=np.array(index["client_offsets"], dtype=np.intp))
+            return self._build_match_index(clients)
+        
+        # Otherwise, fetch from ERPNext; errors propagate rather than look like "no clients"
         logger.info(f"{Fore.CYAN}Fetching client list from ERPNext{Style.RESET_ALL}")
         clients = self.erpnext_api.get_clients()
+        match_index = self._build_match_index(clients)
         
-        # Update cache
-        self.client_cache = clients
-        self.client_cache_timestamp = current_time
+        # An empty list is not cached, so the first client shows up immediately
+        if clients:
+            cache.set_json(cache.CLIENTS_KEY, clients, ttl=CLIENTS_CACHE_TTL)
+            cache.set_json(cache.CLIENTS_INDEX_KEY, {
+                "normalized_names": match_index["normalized_names"],
+                "name_positions": match_index["name_positions"],
+                "choices": match_index["choices"],
+                "choice_labels": match_index["choice_labels"],
+                "client_offsets": match_index["client_offsets"].tolist()
+            }, ttl=CLIENTS_CACHE_TTL)
         
-        return clients
+        return match_index
     
-    def _normalize_name(self, name):
-        """Normalize a client name for better matching"""
-        if not name:
-            return ""
+    def _build_match_index(self, clients):
+        """
+        Normalize client names and aliases once per cache refresh
         
-        # Convert to lowercase
-        name = name.lower()
+        Names and aliases are flattened into a single "choices" list that can
+        be scored in one call. Each client's choices are contiguous, starting
+        at client_offsets[i], with the client name first.
         
-        # Remove common legal entity designations
-        replacements = [
-            (" inc.", ""),
-            (" incorporated", ""),
-            (" corp.", ""),
-            (" corporation", ""),
-            (" llc", ""),
-            (" l.l.c.", ""),
-            (" ltd", ""),
-            (" limited", ""),
-            (" gmbh", ""),
-            (" co.", ""),
-            (" company", ""),
-            (",", ""),
-            (".", "")
-        ]
+        Returns:
+            dict: Match index for the given clients
+        """
+        normalized_names = []
+        name_positions = {}
+        choices = []
+        choice_labels = []
+        client_offsets = []
         
-        for old, new in replacements:
-            name = name.replace(old, new)
+        for client in clients:
+            normalized_name = normalize_client_name(client["client_name"])
+            name_positions.setdefault(normalized_name, len(normalized_names))
+            normalized_names.append(normalized_name)
+            client_offsets.append(len(choices))
+            choices.append(normalized_name)
+            choice_labels.append("client name")
+            for alias in client.get("client_aliases", []):
+                choices.append(normalize_client_name(alias))
+                choice_labels.append(f"alias '{alias}'")
         
-        return name.strip()
+        return {
+            "clients": clients,
+            "normalized_names": normalized_names,
+            "name_positions": name_positions,
+            "choices": choices,
+            "choice_labels": choice_labels,
+            "client_offsets": np.array(client_offsets, dtype=np.intp)
+        }
     
     def _match_client(self, client_info):
         """
@@ -120,7 +143,8 @@ class ClientMapper:
                 }
         """
         # Get existing clients
-        existing_clients = self._get_clients()
+        match_index = self._get_match_index()
+        existing_clients = match_index["clients"]
         
         if not existing_clients:
             logger.warning(f"{Fore.YELLOW}No existing clients found, suggesting to create new client{Style.RESET_ALL}")
@@ -136,9 +160,6 @@ class ClientMapper:
         primary_name = client_info["primary_name"]
         alternative_names = client_info.get("alternative_names", [])
         
-        # Create a list of all names to check (primary + alternatives)
-        all_names_to_check = [primary_name] + alternative_names
-        
         # Best match tracking
         best_match = None
         best_score = 0
@@ -148,63 +169,62 @@ class ClientMapper:
         alternative_matches = []
         
         # Normalize extracted name for matching
-        normalized_primary = self._normalize_name(primary_name)
+        normalized_primary = normalize_client_name(primary_name)
+        
+        # Check for exact match first; this skips fuzzy scoring entirely
+        position = match_index["name_positions"].get(normalized_primary)
+        if position is not None:
+            best_match = existing_clients[position]
+            best_score = 100
+            best_client_id = best_match["client_id"]
+            best_client_name = best_match["client_name"]
+            match_reasons.append("Exact name match (normalized)")
         
-        # Go through each existing client
-        for client in existing_clients:
-            client_id = client["client_id"]
-            client_name = client["client_name"]
-            client_aliases = client.get("client_aliases", [])
+        if best_match is None:
+            # Score every name to check against every client name and alias in one call
+            queries = [normalized_primary] + [normalize_client_name(name) for name in alternative_names]
+            scores = process.cdist(
+                queries,
+                match_index["choices"],
+                scorer=fuzz.ratio,
+                processor=None,
+                score_cutoff=MIN_MATCH_SCORE,
+                dtype=np.uint8,
+                workers=-1
+            )
             
-            # Normalize client name for matching
-            normalized_client_name = self._normalize_name(client_name)
+            # Best score per choice over all names, then per client
+            choice_scores = scores.max(axis=0)
+            client_offsets = match_index["client_offsets"]
+            client_scores = np.maximum.reduceat(choice_scores, client_offsets)
             
-            # Check for exact match first
-            if normalized_primary == normalized_client_name:
-                best_match = client
-                best_score = 100
-                best_client_id = client_id
-                best_client_name = client_name
-                match_reasons.append("Exact name match (normalized)")
-                break
+            # Top candidates in descending score order
+            k = min(6, len(client_scores))
+            top = np.argpartition(client_scores, -k)[-k:]
+            top = top[np.argsort(client_scores[top])[::-1]]
             
-            # Check each name to match against client name and aliases
-            for name_to_check in all_names_to_check:
-                normalized_name = self._normalize_name(name_to_check)
-                
-                # Check against client name
-                score = fuzz.ratio(normalized_name, normalized_client_name)
-                
-                if score > best_score:
-                    best_score = score
-                    best_match = client
-                    best_client_id = client_id
-                    best_client_name = client_name
-                    match_reasons = [f"Fuzzy match with score {score} against client name"]
-                
-                # If the current best is already good enough, no need to check aliases
-                if best_score > 95:
-                    continue
+            best = top[0]
+            if client_scores[best] > 0:
+                best_match = existing_clients[best]
+                best_score = int(client_scores[best])
+                best_client_id = best_match["client_id"]
+                best_client_name = best_match["client_name"]
                 
-                # Check against client aliases
-                for alias in client_aliases:
-                    normalized_alias = self._normalize_name(alias)
-                    alias_score = fuzz.ratio(normalized_name, normalized_alias)
-                    
-                    if alias_score > best_score:
-                        best_score = alias_score
-                        best_match = client
-                        best_client_id = client_id
-                        best_client_name = client_name
-                        match_reasons = [f"Fuzzy match with score {alias_score} against alias '{alias}'"]
+                # Find which of the client's choices produced the best score
+                start = client_offsets[best]
+                end = client_offsets[best + 1] if best + 1 < len(client_offsets) else len(choice_scores)
+                label = match_index["choice_labels"][start + int(choice_scores[start:end].argmax())]
+                match_reasons = [f"Fuzzy match with score {best_score} against {label}"]
             
-            # If this client is a good match but not the best, add to alternatives
-            if best_score < 95 and best_score > 60 and best_match is not client:
-                alternative_matches.append({
-                    "client_id": client_id,
-                    "client_name": client_name,
-                    "confidence_score": best_score / 100
-                })
+            # Other good-but-not-best clients are offered as alternatives
+            for index in top[1:]:
+                score = int(client_scores[index])
+                if 60 < score < 95:
+                    alternative_matches.append({
+                        "client_id": existing_clients[index]["client_id"],
+                        "client_name": existing_clients[index]["client_name"],
+                        "confidence_score": score / 100
+                    })
         
         # Normalize score to 0-1 range
         normalized_score = best_score / 100
@@ -259,7 +279,7 @@ class ClientMapper:
             mapping_result = self._match_client(client_info)
             
             # Save mapping result
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            timestamp = unique_timestamp()
             client_name = client_info["primary_name"].replace(" ", "_")[:30]
             result_path = os.path.join(
                 self.results_dir, 
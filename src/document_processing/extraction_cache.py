@@ -0,0 +1,167 @@
+"""
+Extraction cache for Contract Intelligence Agent
+
+Stores LLM extraction results on disk keyed by the document content and the
+extraction settings, so re-processing the same document skips the LLM call.
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+import threading
+
+from src.utils.helpers import save_json, load_json, ensure_directory_exists
+
+# Logger setup
+logger = logging.getLogger("contract_agent.document_processing")
+
+# Top-level keys every extraction result must have to be served from cache
+REQUIRED_KEYS = ("document_type", "client_info", "contract_details")
+
+def make_cache_key(provider, model_name, prompt_version, document_digest):
+    """
+    Build a cache key from the extraction settings and the document digest
+    
+    Each part is length-prefixed before hashing, so different splits of the
+    same bytes (e.g. model "a", prompt "bc" vs model "ab", prompt "c") can
+    never produce the same key.
+    
+    Args:
+        provider (str): LLM provider name
+        model_name (str): Model name
+        prompt_version (str): Version of the extraction prompt
+        document_digest (bytes): SHA-256 digest of the raw document bytes
+        
+    Returns:
+        str: Hex cache key
+    """
+    hasher = hashlib.sha256()
+    for part in (provider.encode(), model_name.encode(), prompt_version.encode(), document_digest):
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+class ExtractionCache:
+    """Content-addressable on-disk cache of extraction results"""
+    
+    def __init__(self, cache_dir):
+        """Initialize the cache in the given directory"""
+        self.cache_dir = cache_dir
+        ensure_directory_exists(self.cache_dir)
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def get(self, key):
+        """
+        Get a cached extraction result
+        
+        Args:
+            key (str): Cache key from make_cache_key
+            
+        Returns:
+            dict: Cached extraction result, or None on a miss or invalid entry
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        
+        entry = load_json(path)
+        result = entry.get("result") if isinstance(entry, dict) else None
+        if not isinstance(result, dict) or any(k not in result for k in REQUIRED_KEYS):
+            logger.warning(f"Ignoring invalid extraction cache entry {key}")
+            return None
+        
+        return result
+    
+    def put(self, key, result, metadata=None):
+        """
+        Store an extraction result
+        
+        The entry is written to a temporary file and renamed into place, so
+        readers never see a partially written entry.
+        
+        Args:
+            key (str): Cache key from make_cache_key
+            result (dict): Extraction result
+            metadata (dict, optional): Extra information stored with the result
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            if save_json({"result": result, "metadata": metadata or {}}, tmp_path):
+                os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+class SemanticExtractionCache:
+    """
+    Near-duplicate lookup of cached extractions by document text embedding
+    
+    Template-based contracts differ only in a few fields, so an exact hash
+    misses them. Document preambles are embedded with a small local model and
+    searched in a FAISS inner-product index; a hit returns the ExtractionCache
+    key of the most similar previously extracted document.
+    
+    Requires the optional sentence-transformers and faiss packages; the
+    constructor raises ImportError when they are not installed.
+    """
+    
+    # Only the start of the document is embedded; the preamble dominates matches
+    MAX_CHARS = 4000
+    
+    def __init__(self, cache_dir, model_name="sentence-transformers/all-MiniLM-L6-v2"):
+        """Load the embedding model and the persisted index from cache_dir"""
+        import faiss
+        from sentence_transformers import SentenceTransformer
+        
+        self._faiss = faiss
+        self.model = SentenceTransformer(model_name)
+        self.index_path = os.path.join(cache_dir, "semantic.faiss")
+        self.keys_path = os.path.join(cache_dir, "semantic_keys.json")
+        self._lock = threading.Lock()
+        ensure_directory_exists(cache_dir)
+        
+        # keys[i] is the ExtractionCache key of the document embedded at index row i
+        if os.path.exists(self.index_path) and os.path.exists(self.keys_path):
+            self.index = faiss.read_index(self.index_path)
+            self.keys = load_json(self.keys_path) or []
+        else:
+            self.index = faiss.IndexFlatIP(self.model.get_sentence_embedding_dimension())
+            self.keys = []
+    
+    def _embed(self, document_text):
+        # Normalized embeddings make inner product equal to cosine similarity
+        return self.model.encode(
+            [document_text[:self.MAX_CHARS]],
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        ).astype("float32")
+    
+    def search(self, document_text):
+        """
+        Find the most similar previously extracted document
+        
+        Returns:
+            tuple: (cache_key, cosine_similarity), or None if the index is empty
+        """
+        embedding = self._embed(document_text)
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            similarities, rows = self.index.search(embedding, 1)
+            row = int(rows[0][0])
+            if row < 0 or row >= len(self.keys):
+                return None
+            return self.keys[row], float(similarities[0][0])
+    
+    def add(self, document_text, key):
+        """Index a document under its ExtractionCache key and persist the index"""
+        embedding = self._embed(document_text)
+        with self._lock:
+            self.index.add(embedding)
+            self.keys.append(key)
+            self._faiss.write_index(self.index, self.index_path)
+            save_json(self.keys, self.keys_path)
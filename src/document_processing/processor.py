@@ -5,61 +5,221 @@ This module handles the extraction of information from legal documents
 using the Google Gemini API and specialized prompts.
 """
 
-import os
+import io
+import re
+import copy
+import time
+import random
+import asyncio
+import hashlib
 import logging
 import json
-from datetime import datetime
-from colorama import init, Fore, Style
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 import PyPDF2
 import docx
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - PyPDF2 is used instead
+    pdfium = None
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from pydantic import ValidationError
 
-from src.utils.config import Config
-from src.utils.helpers import get_file_extension, save_json, ensure_directory_exists
-
-# Initialize colorama
-init()
+from src.utils.config import get_config
+from src.utils.helpers import get_file_extension, save_json, unique_timestamp, json_loads, create_log_handler
+from src.document_processing.extraction_cache import ExtractionCache, SemanticExtractionCache, make_cache_key
+from src.document_processing.schema import ExtractionSchema, DocumentFieldsSchema
 
 # Logger setup with colors
 logger = logging.getLogger("contract_agent.document_processing")
+logger.addHandler(create_log_handler('%(asctime)s [%(levelname)s] %(message)s'))
+logger.setLevel(logging.INFO)
+
+# Confidence penalty applied to extractions reused from a near-duplicate document
+SEMANTIC_CACHE_CONFIDENCE_FACTOR = 0.95
+
+# Markdown code fence around the JSON in an LLM response
+_JSON_FENCE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+# Approximate Gemini context budget for the document text, in tokens
+MAX_DOCUMENT_TOKENS = 30000
+
+# Rough token size, used to bound text by length instead of tokenizing it
+APPROX_CHARS_PER_TOKEN = 4
+
+# Gemini calls are attempted at most this many times per document
+LLM_MAX_ATTEMPTS = 3
+
+# Rate limiting and temporary outages; retried with exponential backoff
+TRANSIENT_LLM_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+)
+
+# Malformed or incomplete responses; retried with the error fed back to the model
+INVALID_RESPONSE_ERRORS = (json.JSONDecodeError, ValidationError)
+
+# Directory to store extraction results, resolved once per process
+RESULTS_DIR = Path.cwd() / "extraction_results"
+RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+
+# Version of master_prompt; bump whenever the prompt changes so cached extractions are not reused
+PROMPT_VERSION = "v1"
 
-class ColoredFormatter(logging.Formatter):
-    """Custom formatter with colors"""
+# Process pool for CPU-bound text extraction, created on first use
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+def _get_extraction_pool(max_workers):
+    """Get the shared text extraction process pool, or None if it is disabled"""
+    global _extraction_pool
+    if max_workers <= 0:
+        return None
     
-    def format(self, record):
-        if record.levelno >= logging.ERROR:
-            color = Fore.RED
-        elif record.levelno >= logging.WARNING:
-            color = Fore.YELLOW
-        elif record.levelno >= logging.INFO:
-            color = Fore.GREEN
-        else:
-            color = Fore.WHITE
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            # Spawned workers do not inherit the parent's threads and open connections
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extraction_pool
+
+def _extract_text_from_pdf_pdfium(data, max_chars=None):
+    """Extract text content from PDF bytes with pypdfium2"""
+    pdf = pdfium.PdfDocument(data)
+    try:
+        parts, n_chars = [], 0
+        for page in pdf:
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
             
-        record.msg = f"{color}{record.msg}{Style.RESET_ALL}"
-        return super().format(record)
+            parts.append(text)
+            n_chars += len(text)
+            if max_chars is not None and n_chars >= max_chars:
+                break
+        return "\n".join(parts)
+    finally:
+        pdf.close()
 
-# Configure logger with colored formatter
-handler = logging.StreamHandler()
-handler.setFormatter(ColoredFormatter('%(asctime)s [%(levelname)s] %(message)s'))
-logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+def _extract_text_from_pdf_pypdf2(data, max_chars=None):
+    """Extract text content from PDF bytes with PyPDF2"""
+    try:
+        parts, n_chars = [], 0
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+        for page in pdf_reader.pages:
+            text = page.extract_text() or ""
+            parts.append(text)
+            n_chars += len(text)
+            if max_chars is not None and n_chars >= max_chars:
+                break
+        return "\n".join(parts)
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {str(e)}")
+        raise
+
+def _extract_text_from_pdf(data, max_chars=None, pdf_backend="pypdfium2"):
+    """Extract text content from PDF bytes, stopping after max_chars characters"""
+    if pdf_backend == "pypdfium2" and pdfium is not None:
+        try:
+            return _extract_text_from_pdf_pdfium(data, max_chars)
+        except Exception as e:
+            # PDFium rejects some encrypted or malformed files PyPDF2 can still read
+            logger.warning(f"pypdfium2 could not read the PDF, falling back to PyPDF2: {str(e)}")
+    
+    return _extract_text_from_pdf_pypdf2(data, max_chars)
+
+def _extract_text_from_docx(data, max_chars=None):
+    """Extract text content from DOCX bytes, stopping after max_chars characters"""
+    try:
+        doc = docx.Document(io.BytesIO(data))
+        parts, n_chars = [], 0
+        for para in doc.paragraphs:
+            text = para.text
+            parts.append(text)
+            n_chars += len(text)
+            if max_chars is not None and n_chars >= max_chars:
+                break
+        return "\n".join(parts)
+    except Exception as e:
+        logger.error(f"Error extracting text from DOCX: {str(e)}")
+        raise
+
+def _truncate_text(document_text, max_tokens):
+    """Truncate document text to roughly max_tokens tokens"""
+    # Gemini has a context limit, and the last page read may overshoot it.
+    # Text within the character budget is returned without splitting it.
+    max_chars = max_tokens * APPROX_CHARS_PER_TOKEN
+    if len(document_text) > max_chars:
+        logger.warning(f"Document text is too large, truncating to about {max_tokens} tokens")
+        document_text = " ".join(document_text[:max_chars].split()[:max_tokens])
+    return document_text
+
+def extract_text_from_bytes(data, extension, max_tokens=MAX_DOCUMENT_TOKENS, pdf_backend="pypdfium2"):
+    """
+    Extract text content from document bytes based on file type
+    
+    Pages are read only until the token budget is reached; the extraction
+    fields are in the front matter, so the rest of a long contract is skipped.
+    This is a module-level function so it can run in a worker process.
+    
+    Args:
+        data (bytes): Raw document content
+        extension (str): File extension, e.g. ".pdf"
+        max_tokens (int): Approximate token budget for the text
+        pdf_backend (str): "pypdfium2" or "pypdf2"
+        
+    Returns:
+        str: Document text
+    """
+    max_chars = max_tokens * APPROX_CHARS_PER_TOKEN
+    
+    if extension == '.pdf':
+        text = _extract_text_from_pdf(data, max_chars, pdf_backend)
+    elif extension == '.docx':
+        text = _extract_text_from_docx(data, max_chars)
+    else:
+        raise ValueError(f"Unsupported file format: {extension}")
+    
+    return _truncate_text(text, max_tokens)
 
 class DocumentProcessor:
     """Process documents and extract contract information using LLMs"""
     
     def __init__(self):
         """Initialize the document processor with configuration"""
-        self.config = Config()
+        self.config = get_config()
         genai.configure(api_key=self.config.google_ai_api_key)
         
         # Directory to store extraction results
-        self.results_dir = os.path.join(os.getcwd(), "extraction_results")
-        ensure_directory_exists(self.results_dir)
+        self.results_dir = RESULTS_DIR
+        
+        # Cache of extraction results keyed by document content
+        cache_dir = self.results_dir / ".cache"
+        self.extraction_cache = ExtractionCache(cache_dir)
+        
+        # Optional near-duplicate cache on top of the exact cache
+        self.semantic_cache = None
+        if self.config.extraction_cache_enabled and self.config.semantic_cache_enabled:
+            try:
+                self.semantic_cache = SemanticExtractionCache(cache_dir)
+            except ImportError as e:
+                logger.warning(f"Semantic extraction cache disabled, missing dependency: {str(e)}")
+        
+        # Bounds concurrent Gemini calls made through the async API
+        self._llm_semaphore = asyncio.BoundedSemaphore(self.config.llm_max_concurrency)
         
         # Load prompts
         self.master_prompt = self._load_prompt("master_prompt")
+        self._prompt_prefix = self.master_prompt + "\n\nDOCUMENT TEXT:\n"
+        self._fields_prompt_prefix = self._load_prompt("fields_prompt") + "\n\nDOCUMENT TEXT:\n"
         
         # Configure Gemini model
         self.generation_config = {
@@ -69,22 +229,14 @@ class DocumentProcessor:
             "top_k": 40,
         }
         
-        # List available models to select the correct one
-        try:
-            self.models = genai.list_models()
-            self.model_name = None
-            # for model in self.models:
-            #     if "gemini" in model.name.lower() and model.supported_generation_methods.count("generateContent") > 0:
-            #         self.model_name = model.name
-            #         logger.info(f"Selected Gemini model: {self.model_name}")
-            #         break
-            
-            if not self.model_name:
-                logger.warning("No suitable Gemini model found. Using default gemini model.")
-                self.model_name = "gemini-2.0-flash"
-        except Exception as e:
-            logger.warning(f"Error listing Gemini models: {str(e)}. Using default model.")
-            self.model_name = "gemini-2.0-flash"
+        # Model is configured rather than discovered, so startup needs no API call
+        self.model_name = self.config.gemini_model
+        
+        # Gemini model client, shared by all extraction calls
+        self._model = genai.GenerativeModel(
+            model_name=self.model_name,
+            generation_config=self.generation_config
+        )
     
     def _load_prompt(self, prompt_name):
         """Load a prompt template from the config directory"""
@@ -181,125 +333,382 @@ CONFIDENCE SCORING:
 
 Flag any fields with confidence below 0.8 for human review.
 """
+        
+        if prompt_name == "fields_prompt":
+            return """
+You are an AI assistant specialized in analyzing legal contracts. You will be provided with a contract document and need to extract only its client and contract dates.
+
+CLIENT IDENTIFICATION:
+Extract the client/customer name. Look for:
+- Party names in the preamble
+- "Company", "Customer", "Client" references
+- Signature blocks
+- Any entity that is NOT the service provider
+
+Also identify alternative names, DBA (Doing Business As), parent company and subsidiary names.
+
+CONTRACT INFORMATION EXTRACTION:
+1. Effective Date/Start Date
+2. Expiration Date/End Date
+3. Auto-renewal clauses (Yes/No and terms)
+4. Governing law/jurisdiction
+
+OUTPUT FORMAT:
+Return ONLY the following JSON structure:
+
+{
+  "client_info": {
+    "primary_name": "extracted client name",
+    "alternative_names": ["list of any alternative names found"],
+    "confidence_score": 0.95
+  },
+  "contract_details": {
+    "effective_date": "YYYY-MM-DD",
+    "expiration_date": "YYYY-MM-DD",
+    "auto_renewal": {
+      "enabled": true/false,
+      "terms": "renewal terms if applicable"
+    },
+    "governing_law": "jurisdiction"
+  }
+}
+"""
+    
+    def _extract_text_from_bytes(self, data, extension, max_tokens=MAX_DOCUMENT_TOKENS):
+        """Extract text content from document bytes based on file type"""
+        return extract_text_from_bytes(data, extension, max_tokens, self.config.pdf_backend)
+    
+    async def _extract_text_async(self, data, extension, max_tokens=MAX_DOCUMENT_TOKENS):
+        """Extract text content from document bytes in the extraction process pool"""
+        pool = _get_extraction_pool(self.config.extraction_processes)
+        if pool is None:
+            return await asyncio.to_thread(self._extract_text_from_bytes, data, extension, max_tokens)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            pool, extract_text_from_bytes, data, extension, max_tokens, self.config.pdf_backend
+        )
+    
+    def _build_prompt(self, document_text):
+        """Build the extraction prompt for the document text"""
+        # Create the prompt with the document text
+        return self._prompt_prefix + document_text
+    
+    def _parse_llm_response(self, result_text, schema=ExtractionSchema):
+        """Parse and validate the JSON extraction from the LLM response text"""
+        # Try to parse the JSON from the response
+        # It might be wrapped in markdown code blocks
+        match = _JSON_FENCE.search(result_text)
+        json_str = match.group(1) if match else result_text.strip()
+        
+        # Parse the JSON and check it against the expected structure
+        result = json_loads(json_str)
+        validated = schema.model_validate(result)
+        if "document_type" in result:
+            # Store the canonical spelling ("SOW" -> "SoW") that downstream code compares against
+            result["document_type"] = validated.document_type
+        return result
     
-    def _extract_text_from_pdf(self, file_path):
-        """Extract text content from a PDF file"""
+    def _plan_retry(self, prompt, attempt, error):
+        """
+        Decide how to retry a failed Gemini call
+        
+        Args:
+            prompt (str): Original extraction prompt
+            attempt (int): Zero-based number of the failed attempt
+            error (Exception): Error raised by the attempt
+            
+        Returns:
+            tuple: (delay_seconds, prompt for the next attempt)
+        """
+        if attempt + 1 >= LLM_MAX_ATTEMPTS:
+            raise error
+        
+        if isinstance(error, TRANSIENT_LLM_ERRORS):
+            delay = 2 ** attempt + random.random()
+            logger.warning(f"Gemini API unavailable ({str(error)}), retrying in {delay:.1f}s")
+            return delay, prompt
+        
+        # Tell the model what was wrong with its previous output
+        logger.warning(f"Invalid extraction from LLM (attempt {attempt + 1}), retrying: {str(error)}")
+        feedback_prompt = (
+            f"{prompt}\n\nYour previous output had error: {error}. "
+            "Return ONLY valid JSON matching the OUTPUT FORMAT above."
+        )
+        return 1.0 * (attempt + 1), feedback_prompt
+    
+    def _process_with_llm(self, document_text, prompt=None, schema=ExtractionSchema):
+        """
+        Process document text with Google Gemini API
+        
+        Args:
+            document_text (str): Extracted document text
+            prompt (str, optional): Complete prompt; defaults to the master prompt
+            schema: Pydantic model the response must match
+        """
         try:
-            text = ""
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-            return text
+            prompt = prompt or self._build_prompt(document_text)
+            
+            request_prompt = prompt
+            for attempt in range(LLM_MAX_ATTEMPTS):
+                try:
+                    # Call the Gemini API
+                    response = self._model.generate_content(request_prompt)
+                    return self._parse_llm_response(response.text, schema)
+                except TRANSIENT_LLM_ERRORS + INVALID_RESPONSE_ERRORS as e:
+                    delay, request_prompt = self._plan_retry(prompt, attempt, e)
+                    time.sleep(delay)
+                
         except Exception as e:
-            logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
+            logger.error(f"Error processing document with LLM: {str(e)}")
             raise
     
-    def _extract_text_from_docx(self, file_path):
-        """Extract text content from a DOCX file"""
+    async def _process_with_llm_async(self, document_text, prompt=None, schema=ExtractionSchema):
+        """Process document text with the async Google Gemini API (see _process_with_llm)"""
         try:
-            doc = docx.Document(file_path)
-            text = ""
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-            return text
+            prompt = prompt or self._build_prompt(document_text)
+            
+            request_prompt = prompt
+            for attempt in range(LLM_MAX_ATTEMPTS):
+                try:
+                    # Call the Gemini API without blocking the event loop
+                    response = await self._model.generate_content_async(request_prompt)
+                    return self._parse_llm_response(response.text, schema)
+                except TRANSIENT_LLM_ERRORS + INVALID_RESPONSE_ERRORS as e:
+                    delay, request_prompt = self._plan_retry(prompt, attempt, e)
+                    await asyncio.sleep(delay)
+                
         except Exception as e:
-            logger.error(f"Error extracting text from DOCX {file_path}: {str(e)}")
+            logger.error(f"Error processing document with LLM: {str(e)}")
             raise
     
-    def _extract_text(self, file_path):
-        """Extract text content from a document based on file type"""
-        extension = get_file_extension(file_path)
-        
-        if extension == '.pdf':
-            return self._extract_text_from_pdf(file_path)
-        elif extension == '.docx':
-            return self._extract_text_from_docx(file_path)
-        else:
-            raise ValueError(f"Unsupported file format: {extension}")
+    def _find_similar_extraction(self, document_text):
+        """
+        Find a cached extraction of a near-duplicate document
+        
+        Args:
+            document_text (str): Extracted document text
+            
+        Returns:
+            dict: Copy of the cached extraction with reduced confidence, or None.
+                Its client_info and contract_details belong to the other
+                document and must be replaced (see _refresh_document_fields).
+        """
+        if self.semantic_cache is None:
+            return None
+        
+        match = self.semantic_cache.search(document_text)
+        if match is None:
+            return None
+        
+        cache_key, similarity = match
+        if similarity < self.config.semantic_cache_threshold:
+            return None
+        
+        cached_result = self.extraction_cache.get(cache_key)
+        if cached_result is None:
+            return None
+        
+        # The documents are similar, not identical, so trust the result a bit less
+        extraction_result = copy.deepcopy(cached_result)
+        confidence = extraction_result.setdefault("extraction_confidence", {})
+        confidence["overall"] = (confidence.get("overall") or 0) * SEMANTIC_CACHE_CONFIDENCE_FACTOR
+        extraction_result.setdefault("extraction_notes", []).append(
+            f"Reused extraction of a near-duplicate document (similarity {similarity:.3f})"
+        )
+        
+        logger.info(f"Using extraction of a near-duplicate document (similarity {similarity:.3f})")
+        return extraction_result
     
-    def _process_with_llm(self, document_text):
-        """Process document text with Google Gemini API"""
-        try:
-            # Check if text is too large and truncate if necessary
-            # Gemini has a context limit, so we may need to truncate
-            max_tokens = 30000  # Approximate token limit for Gemini
-            if len(document_text.split()) > max_tokens:
-                logger.warning(f"Document text is too large, truncating to {max_tokens} tokens")
-                document_text = " ".join(document_text.split()[:max_tokens])
+    def _refresh_document_fields(self, extraction_result, fields):
+        """
+        Replace the per-document fields of a reused near-duplicate extraction
+        
+        Template contracts share most of their text but differ in exactly
+        these fields, so they are always taken from this document.
+        
+        Args:
+            extraction_result (dict): Extraction reused from a near-duplicate
+            fields (dict): Fresh client_info and contract_details for this document
             
-            # Create the prompt with the document text
-            prompt = self.master_prompt + "\n\nDOCUMENT TEXT:\n" + document_text
+        Returns:
+            dict: The updated extraction result
+        """
+        extraction_result["client_info"] = fields["client_info"]
+        extraction_result["contract_details"] = fields["contract_details"]
+        return extraction_result
+    
+    def _lookup_extraction(self, file_path):
+        """
+        Read a document and look up its cached extraction by content
+        
+        The bytes are returned so text extraction does not read the file again.
+        
+        Args:
+            file_path (str): Path to the document file
             
-            # Initialize Gemini model
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=self.generation_config
-            )
+        Returns:
+            tuple: (cache_key, extraction_result, data); extraction_result is None on a miss
+        """
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        document_digest = hashlib.sha256(data).digest()
+        cache_key = make_cache_key("gemini", self.model_name, PROMPT_VERSION, document_digest)
+        if not self.config.extraction_cache_enabled:
+            return cache_key, None, data
+        
+        extraction_result = self.extraction_cache.get(cache_key)
+        if extraction_result is not None:
+            logger.info(f"Using cached extraction for {file_path}")
+        return cache_key, extraction_result, data
+    
+    def _load_cached_extraction(self, file_path):
+        """
+        Look up a cached extraction for a document
+        
+        Args:
+            file_path (str): Path to the document file
             
-            # Call the Gemini API
-            response = model.generate_content(prompt)
+        Returns:
+            tuple: (cache_key, extraction_result, document_text); extraction_result
+                is None on a cache miss, document_text is None on an exact hit
+        """
+        # Look up the extraction by document content first
+        cache_key, extraction_result, data = self._lookup_extraction(file_path)
+        if extraction_result is not None:
+            return cache_key, extraction_result, None
+        
+        # Extract text from document
+        document_text = self._extract_text_from_bytes(data, get_file_extension(file_path))
+        
+        # Reuse the extraction of a near-duplicate document if there is one
+        return cache_key, self._find_similar_extraction(document_text), document_text
+    
+    def _store_extraction(self, file_path, cache_key, extraction_result, document_text):
+        """Add a fresh LLM extraction to the extraction caches"""
+        if not self.config.extraction_cache_enabled:
+            return
+        
+        self.extraction_cache.put(cache_key, extraction_result, {
+            "source_file": Path(file_path).name,
+            "model_name": self.model_name,
+            "prompt_version": PROMPT_VERSION
+        })
+        if self.semantic_cache is not None:
+            self.semantic_cache.add(document_text, cache_key)
+    
+    def _save_result(self, file_path, extraction_result):
+        """Save the extraction result and warn about low confidence"""
+        # Save extraction result
+        timestamp = unique_timestamp()
+        filename = Path(file_path).name
+        result_path = self.results_dir / f"{filename}_{timestamp}_extraction.json"
+        save_json(extraction_result, result_path)
+        
+        # Check confidence levels and log warnings for low confidence
+        overall_confidence = extraction_result.get("extraction_confidence", {}).get("overall") or 0
+        if overall_confidence < self.config.extraction_confidence_threshold:
+            logger.warning(f"Low confidence extraction ({overall_confidence}) for {filename}")
+        
+        return extraction_result
+    
+    def process_document(self, file_path):
+        """
+        Process a document to extract contract information
+        
+        Args:
+            file_path (str): Path to the document file
+            
+        Returns:
+            dict: Extracted contract information
+        """
+        try:
+            logger.info(f"Processing document: {file_path}")
             
-            # Extract the response text
-            result_text = response.text
+            cache_key, extraction_result, document_text = self._load_cached_extraction(file_path)
             
-            # Try to parse the JSON from the response
-            # It might be wrapped in markdown code blocks
-            if "```json" in result_text and "```" in result_text:
-                json_str = result_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in result_text:
-                json_str = result_text.split("```")[1].split("```")[0].strip()
-            else:
-                json_str = result_text
+            if extraction_result is None:
+                # Process text with LLM
+                extraction_result = self._process_with_llm(document_text)
+                self._store_extraction(file_path, cache_key, extraction_result, document_text)
+            elif document_text is not None:
+                # Near-duplicate hit: re-extract only the fields that differ between documents
+                fields = self._process_with_llm(
+                    document_text, self._fields_prompt_prefix + document_text, DocumentFieldsSchema
+                )
+                self._refresh_document_fields(extraction_result, fields)
+            
+            return self._save_result(file_path, extraction_result)
             
-            # Parse the JSON
-            try:
-                result = json.loads(json_str)
-                return result
-            except json.JSONDecodeError:
-                logger.error(f"Failed to parse JSON from LLM response: {result_text}")
-                raise
-                
         except Exception as e:
-            logger.error(f"Error processing document with LLM: {str(e)}")
+            logger.error(f"Error processing document {file_path}: {str(e)}")
             raise
     
-    def process_document(self, file_path):
+    async def process_document_async(self, file_path, semaphore=None):
         """
-        Process a document to extract contract information
+        Process a document without blocking the event loop
+        
+        Text extraction runs in the extraction process pool and file I/O in
+        worker threads; the Gemini call uses the async client and is bounded
+        by the semaphore. Each document starts its Gemini call as soon as its
+        own text is ready.
         
         Args:
             file_path (str): Path to the document file
+            semaphore (asyncio.Semaphore): Bound on concurrent Gemini calls;
+                defaults to the processor-wide LLM_MAX_CONCURRENCY bound
             
         Returns:
             dict: Extracted contract information
         """
+        semaphore = semaphore or self._llm_semaphore
         try:
             logger.info(f"Processing document: {file_path}")
             
-            # Extract text from document
-            document_text = self._extract_text(file_path)
+            cache_key, extraction_result, data = await asyncio.to_thread(self._lookup_extraction, file_path)
             
-            # Process text with LLM
-            extraction_result = self._process_with_llm(document_text)
-            
-            # Save extraction result
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = os.path.basename(file_path)
-            result_path = os.path.join(
-                self.results_dir, 
-                f"{filename}_{timestamp}_extraction.json"
-            )
-            save_json(extraction_result, result_path)
+            document_text = None
+            if extraction_result is None:
+                document_text = await self._extract_text_async(data, get_file_extension(file_path))
+                
+                # Reuse the extraction of a near-duplicate document if there is one
+                extraction_result = await asyncio.to_thread(self._find_similar_extraction, document_text)
+                
+                if extraction_result is not None:
+                    # Re-extract only the fields that differ between near-duplicates
+                    async with semaphore:
+                        fields = await self._process_with_llm_async(
+                            document_text, self._fields_prompt_prefix + document_text, DocumentFieldsSchema
+                        )
+                    self._refresh_document_fields(extraction_result, fields)
             
-            # Check confidence levels and log warnings for low confidence
-            overall_confidence = extraction_result.get("extraction_confidence", {}).get("overall", 0)
-            if overall_confidence < self.config.extraction_confidence_threshold:
-                logger.warning(f"Low confidence extraction ({overall_confidence}) for {filename}")
+            if extraction_result is None:
+                # Process text with LLM
+                async with semaphore:
+                    extraction_result = await self._process_with_llm_async(document_text)
+                await asyncio.to_thread(
+                    self._store_extraction, file_path, cache_key, extraction_result, document_text
+                )
             
-            return extraction_result
+            return await asyncio.to_thread(self._save_result, file_path, extraction_result)
             
         except Exception as e:
             logger.error(f"Error processing document {file_path}: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+    
+    async def process_batch(self, file_paths, concurrency=8):
+        """
+        Process several documents concurrently
+        
+        Args:
+            file_paths (list): Paths to the document files
+            concurrency (int): Maximum number of concurrent Gemini calls
+            
+        Returns:
+            list: Extraction result or exception for each file, in input order
+        """
+        semaphore = asyncio.BoundedSemaphore(concurrency)
+        return await asyncio.gather(
+            *(self.process_document_async(file_path, semaphore) for file_path in file_paths),
+            return_exceptions=True
+        ) 
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Extraction schema for Contract Intelligence Agent
+
+Pydantic models describing the JSON structure requested by the master prompt.
+LLM responses are validated against them before they are used or cached.
+"""
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+# Canonical document type names, keyed by their lowercase form
+DOCUMENT_TYPES = {"nda": "NDA", "msa": "MSA", "sow": "SoW"}
+
+class _ExtractionModel(BaseModel):
+    """Base model that keeps any extra fields the LLM returns"""
+    
+    model_config = ConfigDict(extra="allow")
+
+class ClientInfo(_ExtractionModel):
+    """Client identification"""
+    
+    primary_name: str = Field(min_length=1)
+    alternative_names: List[str] = []
+    confidence_score: Optional[float] = Field(default=None, ge=0, le=1)
+
+class AutoRenewal(_ExtractionModel):
+    """Auto-renewal clause"""
+    
+    enabled: Optional[bool] = None
+    terms: Optional[str] = None
+
+class ContractDetails(_ExtractionModel):
+    """Details common to all document types"""
+    
+    effective_date: Optional[str] = None
+    expiration_date: Optional[str] = None
+    auto_renewal: Optional[AutoRenewal] = None
+    governing_law: Optional[str] = None
+
+class ExtractionConfidence(_ExtractionModel):
+    """Confidence scores for the extraction"""
+    
+    # Missing scores are treated as 0 (a low-confidence warning), not rejected
+    overall: Optional[float] = Field(default=0, ge=0, le=1)
+    field_level: dict = {}
+
+class ExtractionSchema(_ExtractionModel):
+    """Complete extraction result"""
+    
+    document_type: Literal["NDA", "MSA", "SoW"]
+    client_info: ClientInfo
+    contract_details: ContractDetails
+    type_specific_details: dict = {}
+    extraction_confidence: ExtractionConfidence = Field(default_factory=ExtractionConfidence)
+    extraction_notes: List[str] = []
+    
+    @field_validator("document_type", mode="before")
+    @classmethod
+    def _normalize_document_type(cls, value):
+        """Accept document types in any case, e.g. "SOW" or "nda" """
+        if isinstance(value, str):
+            return DOCUMENT_TYPES.get(value.strip().lower(), value)
+        return value
+
+class DocumentFieldsSchema(_ExtractionModel):
+    """Per-document fields re-extracted when reusing a near-duplicate's extraction"""
+    
+    client_info: ClientInfo
+    contract_details: ContractDetails
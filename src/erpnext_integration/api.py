@@ -5,60 +5,110 @@ This module handles interactions with the ERPNext API to create and update
 client records, contract records, and alerts.
 """
 
-import os
+import time
+import asyncio
 import logging
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import gzip
 import base64
 from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import urllib.parse
-from colorama import Fore, Style, init
 
-from src.utils.config import Config
-from src.utils.helpers import parse_date, save_json, ensure_directory_exists
+import numpy as np
 
-# Initialize colorama
-init()
-
-# Logger setup with colors
-class ColoredFormatter(logging.Formatter):
-    """Custom formatter with colors for different log levels"""
-    
-    COLORS = {
-        'DEBUG': Fore.BLUE,
-        'INFO': Fore.GREEN,
-        'WARNING': Fore.YELLOW,
-        'ERROR': Fore.RED,
-        'CRITICAL': Fore.RED + Style.BRIGHT
-    }
-    
-    def format(self, record):
-        if not record.exc_info:
-            level = record.levelname
-            if level in self.COLORS:
-                record.msg = f"{self.COLORS[level]}{record.msg}{Style.RESET_ALL}"
-        return super().format(record)
+from src.utils.config import get_config
+from src.utils.helpers import parse_date, unique_timestamp, normalize_client_name, json_loads, json_dumps, to_json_line, create_log_handler
+from src.utils import cache
 
 # Configure logger with colored output
 logger = logging.getLogger("contract_agent.erpnext_integration")
-handler = logging.StreamHandler()
-handler.setFormatter(ColoredFormatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-logger.addHandler(handler)
+logger.addHandler(create_log_handler('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
 logger.setLevel(logging.INFO)
 
+# Connections kept open to ERPNext; covers concurrent documents and alert queries
+HTTP_POOL_SIZE = 32
+
+# Retries for failed connections and throttled / unavailable responses;
+# only idempotent methods are retried, so POSTs never create duplicates
+HTTP_RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+
+# HTTP methods supported by _make_request
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+# Directory to store API transaction logs, resolved once per process
+LOG_DIR = Path.cwd() / "erpnext_logs"
+LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+# Rows fetched per page when listing all clients
+CLIENT_PAGE_SIZE = 500
+
+# How long the full client list is reused before it is fetched again, in seconds
+CLIENTS_CACHE_TTL = 300
+
+# Fields fetched for client records
+CLIENT_FIELDS = json.dumps([
+    "name", "client_id", "client_name", "client_aliases", 
+    "industry", "status", "created_date", "modified_date"
+])
+
+# Extracted SoW type (lowercased) -> ContractCustom sow_type option
+SOW_TYPE_MAP = {
+    "time & material": "T&M",
+    "time and material": "T&M",
+    "t&m": "T&M",
+    "retainer": "Retainer",
+    "fixed cost": "Fixed Cost",
+    "fixed price": "Fixed Cost",
+    "fixed": "Fixed Cost"
+}
+
+# Request bodies larger than this are gzip-compressed when enabled
+GZIP_MIN_BYTES = 1024
+
 class ERPNextAPI:
     """Interface for the ERPNext API"""
     
     def __init__(self):
         """Initialize the ERPNext API client with configuration"""
-        self.config = Config()
+        self.config = get_config()
         self.base_url = self.config.erpnext_url
         self.api_key = self.config.erpnext_api_key
         self.api_secret = self.config.erpnext_api_secret
         
+        # Shared session so requests reuse pooled keep-alive connections;
+        # responses are gzip-compressed by ERPNext when the client accepts it
+        self.session = requests.Session()
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=HTTP_RETRY)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # The credentials do not change, so the headers are built once
+        self._auth_headers = self._get_auth_headers()
+        
+        # Bounds ERPNext calls in flight through the async variants
+        self._async_semaphore = asyncio.BoundedSemaphore(self.config.erpnext_concurrency)
+        
+        # Full client list memo: (fetched_at, clients), dropped when a client is created
+        self._clients_cache = None
+        self._clients_lock = threading.Lock()
+        # Bumped on every invalidation, so a fetch that started earlier cannot store a stale list
+        self._clients_generation = 0
+        
+        # Serializes the lookup-then-create in create_client across concurrent documents
+        self._create_client_lock = threading.Lock()
+        
         # Directory to store API transaction logs
-        self.log_dir = os.path.join(os.getcwd(), "erpnext_logs")
-        ensure_directory_exists(self.log_dir)
+        self.log_dir = LOG_DIR
+        
+        # Log lines are appended by a single background thread, in request order
+        self._log_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="erpnext-log")
     
     def _get_auth_headers(self):
         """Get authentication headers for ERPNext API requests"""
@@ -70,7 +120,7 @@ class ERPNextAPI:
             "Accept": "application/json"
         }
     
-    def _make_request(self, method, endpoint, data=None, params=None):
+    def _make_request(self, method, endpoint, data=None, params=None, api_type="resource"):
         """
         Make an API request to ERPNext
         
@@ -79,51 +129,52 @@ class ERPNextAPI:
             endpoint (str): API endpoint to call
             data (dict, optional): Request body data
             params (dict, optional): Query parameters
+            api_type (str): "resource" for DocType endpoints, "method" for whitelisted methods
             
         Returns:
             dict: Response data
         """
-        url = f"{self.base_url}/api/resource/{endpoint}"
-        headers = self._get_auth_headers()
+        url = f"{self.base_url}/api/{api_type}/{endpoint}"
+        headers = self._auth_headers
         
         try:
-            # Log the request
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            log_data = {
-                "timestamp": timestamp,
-                "method": method,
-                "url": url,
-                "headers": {k: v for k, v in headers.items() if k != "Authorization"},
-                "params": params,
-                "data": data
-            }
+            # Compress large bodies if the ERPNext server accepts gzip-encoded requests
+            body = None
+            if data is not None and self.config.erpnext_gzip_requests:
+                body = json_dumps(data).encode()
+                if len(body) > GZIP_MIN_BYTES:
+                    body = gzip.compress(body)
+                    headers = {**headers, "Content-Encoding": "gzip"}
             
             # Make the request
-            if method == "GET":
-                response = requests.get(url, headers=headers, params=params)
-            elif method == "POST":
-                response = requests.post(url, headers=headers, json=data, params=params)
-            elif method == "PUT":
-                response = requests.put(url, headers=headers, json=data, params=params)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=headers, params=params)
-            else:
+            if method not in HTTP_METHODS:
                 raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            # Log the response
-            log_data["status_code"] = response.status_code
-            log_data["response"] = response.json() if response.text else None
-            
-            log_path = os.path.join(
-                self.log_dir, 
-                f"{endpoint.replace('/', '_')}_{method}_{timestamp}.json"
-            )
-            save_json(log_data, log_path)
+            if body is not None:
+                response = self.session.request(method, url, headers=headers, data=body, params=params)
+            else:
+                response = self.session.request(method, url, headers=headers, json=data, params=params)
+            
+            result = json_loads(response.content) if response.content else None
+            
+            # Log the transaction
+            if self.config.erpnext_log_requests:
+                now = datetime.now()
+                log_line = to_json_line({
+                    "timestamp": now.isoformat(),
+                    "method": method,
+                    "url": url,
+                    "headers": {k: v for k, v in headers.items() if k != "Authorization"},
+                    "params": params,
+                    "data": data,
+                    "status_code": response.status_code,
+                    "response": result
+                })
+                self._log_exec.submit(self._append_log_line, now.strftime("%Y%m%d"), log_line)
             
             # Check for errors
             response.raise_for_status()
             
-            return response.json()
+            return result
             
         except requests.exceptions.HTTPError as e:
             logger.error(f"HTTP error making {method} request to {url}: {str(e)}")
@@ -135,41 +186,122 @@ class ERPNextAPI:
             logger.error(f"Error making {method} request to {url}: {str(e)}")
             raise
     
-    def get_clients(self):
+    def _append_log_line(self, day, log_line):
+        """Append one transaction to the day's JSONL log (runs on the log thread)"""
+        try:
+            log_path = self.log_dir / f"transactions-{day}.jsonl"
+            with open(log_path, 'a') as f:
+                f.write(log_line)
+        except Exception as e:
+            logger.error(f"Error writing ERPNext transaction log: {str(e)}")
+    
+    def insert_many(self, docs):
         """
-        Get a list of all clients from ERPNext
+        Insert several documents in a single request via frappe.client.insert_many
         
+        Args:
+            docs (list): Documents to insert, each with its "doctype" set
+            
+        Returns:
+            list: Names of the inserted documents, in the same order as docs
+        """
+        response = self._make_request(
+            "POST",
+            "frappe.client.insert_many",
+            data={"docs": json_dumps(docs)},
+            api_type="method"
+        )
+        return response.get("message") or []
+    
+    def _to_client(self, client_data):
+        """Convert an ERPNext Client row to a client record"""
+        return {
+            "client_id": client_data.get("client_id") or client_data.get("name"),
+            "client_name": client_data.get("client_name"),
+            "client_aliases": client_data.get("client_aliases", "").split(",") if client_data.get("client_aliases") else [],
+            "industry": client_data.get("industry"),
+            "status": client_data.get("status"),
+            "created_date": client_data.get("created_date"),
+            "modified_date": client_data.get("modified_date")
+        }
+    
+    def get_clients(self, limit_page_length=None):
+        """
+        Get a list of clients from ERPNext
+        
+        The full list is fetched page by page and reused for CLIENTS_CACHE_TTL
+        seconds.
+        
+        Args:
+            limit_page_length (int, optional): Return at most this many clients;
+                all clients when not given
+            
         Returns:
             list: List of client records
+            
+        Raises:
+            Exception: If ERPNext cannot be reached; a failed fetch is never
+                reported (or cached) as an empty client list
         """
+        if limit_page_length is None:
+            with self._clients_lock:
+                if self._clients_cache is not None and time.monotonic() - self._clients_cache[0] < CLIENTS_CACHE_TTL:
+                    return list(self._clients_cache[1])
+                generation = self._clients_generation
+        
         try:
             # Get client list from ERPNext
-            params = {
-                "fields": json.dumps([
-                    "name", "client_id", "client_name", "client_aliases", 
-                    "industry", "status", "created_date", "modified_date"
-                ])
-            }
-            response = self._make_request("GET", "Client", params=params)
-            
+            page_size = limit_page_length or CLIENT_PAGE_SIZE
             clients = []
-            for client_data in response.get("data", []):
-                client = {
-                    "client_id": client_data.get("client_id") or client_data.get("name"),
-                    "client_name": client_data.get("client_name"),
-                    "client_aliases": client_data.get("client_aliases", "").split(",") if client_data.get("client_aliases") else [],
-                    "industry": client_data.get("industry"),
-                    "status": client_data.get("status"),
-                    "created_date": client_data.get("created_date"),
-                    "modified_date": client_data.get("modified_date")
+            while True:
+                params = {
+                    "fields": CLIENT_FIELDS,
+                    "limit_start": len(clients),
+                    "limit_page_length": page_size
                 }
-                clients.append(client)
+                response = self._make_request("GET", "Client", params=params)
+                rows = response.get("data", [])
+                clients.extend(self._to_client(client_data) for client_data in rows)
+                
+                # A short page is the last one
+                if limit_page_length is not None or len(rows) < page_size:
+                    break
             
             logger.info(f"Retrieved {len(clients)} clients from ERPNext")
+            
+            if limit_page_length is None:
+                with self._clients_lock:
+                    if generation == self._clients_generation:
+                        self._clients_cache = (time.monotonic(), clients)
+                clients = list(clients)
             return clients
             
         except Exception as e:
             logger.error(f"Error getting clients from ERPNext: {str(e)}")
+            raise
+    
+    def get_client_by_name(self, name, limit_page_length=5):
+        """
+        Find clients whose name contains the given name, filtered by ERPNext
+        
+        Args:
+            name (str): Client name to search for
+            limit_page_length (int): Maximum number of clients to return
+            
+        Returns:
+            list: Matching client records
+        """
+        try:
+            params = {
+                "filters": json.dumps([["client_name", "like", f"%{name}%"]]),
+                "fields": CLIENT_FIELDS,
+                "limit_page_length": limit_page_length
+            }
+            response = self._make_request("GET", "Client", params=params)
+            return [self._to_client(client_data) for client_data in response.get("data", [])]
+            
+        except Exception as e:
+            logger.error(f"Error finding client '{name}' in ERPNext: {str(e)}")
             return []
     
     def create_client(self, client_info):
@@ -188,82 +320,77 @@ class ERPNextAPI:
             dict: Created client record
         """
         try:
-            # First, check if a similar client already exists
-            existing_clients = self.get_clients()
-            primary_name = client_info["primary_name"]
-            
-            # Normalize the primary name for comparison
-            def normalize_name(name):
-                if not name:
-                    return ""
-                name = name.lower()
-                replacements = [
-                    (" inc.", ""), (" incorporated", ""), (" corp.", ""), (" corporation", ""),
-                    (" llc", ""), (" l.l.c.", ""), (" ltd", ""), (" limited", ""), 
-                    (" gmbh", ""), (" co.", ""), (" company", ""), (",", ""), (".", "")
-                ]
-                for old, new in replacements:
-                    name = name.replace(old, new)
-                return name.strip()
-            
-            normalized_primary = normalize_name(primary_name)
-            
-            # Check for exact matches (normalized)
-            for existing_client in existing_clients:
-                existing_normalized = normalize_name(existing_client.get("client_name", ""))
-                if normalized_primary == existing_normalized:
-                    logger.warning(f"Client '{primary_name}' already exists as '{existing_client['client_name']}' (ID: {existing_client['client_id']})")
-                    # Return the existing client instead of creating a duplicate
-                    return {
-                        "client_id": existing_client["client_id"],
-                        "client_name": existing_client["client_name"],
-                        "client_aliases": existing_client.get("client_aliases", []),
-                        "status": existing_client.get("status", "Active"),
-                        "created_date": existing_client.get("created_date"),
-                        "is_existing": True  # Flag to indicate this was not newly created
-                    }
+            # Two documents for the same new client must not both miss the check
+            # below and create it twice
+            with self._create_client_lock:
+                # First, check if a similar client already exists
+                existing_clients = self.get_clients()
+                primary_name = client_info["primary_name"]
                 
-                # Also check aliases
-                existing_aliases = existing_client.get("client_aliases", [])
-                for alias in existing_aliases:
-                    if normalized_primary == normalize_name(alias):
-                        logger.warning(f"Client '{primary_name}' already exists as alias of '{existing_client['client_name']}' (ID: {existing_client['client_id']})")
+                normalized_primary = normalize_client_name(primary_name)
+                
+                # Check for exact matches (normalized)
+                for existing_client in existing_clients:
+                    existing_normalized = normalize_client_name(existing_client.get("client_name", ""))
+                    if normalized_primary == existing_normalized:
+                        logger.warning(f"Client '{primary_name}' already exists as '{existing_client['client_name']}' (ID: {existing_client['client_id']})")
+                        # Return the existing client instead of creating a duplicate
                         return {
                             "client_id": existing_client["client_id"],
                             "client_name": existing_client["client_name"],
                             "client_aliases": existing_client.get("client_aliases", []),
                             "status": existing_client.get("status", "Active"),
                             "created_date": existing_client.get("created_date"),
-                            "is_existing": True
+                            "is_existing": True  # Flag to indicate this was not newly created
                         }
-            
-            # No exact match found, proceed with creation
-            # Create data for the client record
-            client_data = {
-                "doctype": "Client",
-                "client_id": f"CLI-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                "client_name": client_info["primary_name"],
-                "client_aliases": ",".join(client_info.get("alternative_names", [])),
-                "status": "Active",
-                "created_date": datetime.now().strftime("%Y-%m-%d")
-            }
-            
-            # Create the client in ERPNext
-            response = self._make_request("POST", "Client", data=client_data)
-            
-            logger.info(f"Created new client: {client_info['primary_name']}")
-            
-            # Return the created client
-            created_client = {
-                "client_id": response.get("data", {}).get("name"),
-                "client_name": client_info["primary_name"],
-                "client_aliases": client_info.get("alternative_names", []),
-                "status": "Active",
-                "created_date": datetime.now().strftime("%Y-%m-%d"),
-                "is_existing": False  # Flag to indicate this was newly created
-            }
-            
-            return created_client
+                    
+                    # Also check aliases
+                    existing_aliases = existing_client.get("client_aliases", [])
+                    for alias in existing_aliases:
+                        if normalized_primary == normalize_client_name(alias):
+                            logger.warning(f"Client '{primary_name}' already exists as alias of '{existing_client['client_name']}' (ID: {existing_client['client_id']})")
+                            return {
+                                "client_id": existing_client["client_id"],
+                                "client_name": existing_client["client_name"],
+                                "client_aliases": existing_client.get("client_aliases", []),
+                                "status": existing_client.get("status", "Active"),
+                                "created_date": existing_client.get("created_date"),
+                                "is_existing": True
+                            }
+                
+                # No exact match found, proceed with creation
+                # Create data for the client record
+                client_data = {
+                    "doctype": "Client",
+                    "client_id": f"CLI-{unique_timestamp()}",
+                    "client_name": client_info["primary_name"],
+                    "client_aliases": ",".join(client_info.get("alternative_names", [])),
+                    "status": "Active",
+                    "created_date": datetime.now().strftime("%Y-%m-%d")
+                }
+                
+                # Create the client in ERPNext
+                response = self._make_request("POST", "Client", data=client_data)
+                
+                # The cached client lists no longer include every client
+                with self._clients_lock:
+                    self._clients_cache = None
+                    self._clients_generation += 1
+                cache.invalidate_clients()
+                
+                logger.info(f"Created new client: {client_info['primary_name']}")
+                
+                # Return the created client
+                created_client = {
+                    "client_id": response.get("data", {}).get("name"),
+                    "client_name": client_info["primary_name"],
+                    "client_aliases": client_info.get("alternative_names", []),
+                    "status": "Active",
+                    "created_date": datetime.now().strftime("%Y-%m-%d"),
+                    "is_existing": False  # Flag to indicate this was newly created
+                }
+                
+                return created_client
             
         except Exception as e:
             logger.error(f"Error creating client in ERPNext: {str(e)}")
@@ -290,17 +417,17 @@ class ERPNextAPI:
             # Prepare contract data
             contract_data = {
                 "doctype": "ContractCustom",
-                "contract_id": f"CON-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+                "contract_id": f"CON-{unique_timestamp()}",
                 "client_id": client_id,
                 "contract_type": document_type,
-                "contract_name": os.path.basename(document_path),
+                "contract_name": Path(document_path).name,
                 "effective_date": contract_details.get("effective_date"),
                 "expiration_date": contract_details.get("expiration_date"),
                 "auto_renewal": "Yes" if contract_details.get("auto_renewal", {}).get("enabled") else "No",
                 "renewal_terms": contract_details.get("auto_renewal", {}).get("terms"),
                 "status": "Active",
-                "extraction_confidence": extraction_result.get("extraction_confidence", {}).get("overall", 0),
-                "extraction_log": json.dumps(extraction_result),
+                "extraction_confidence": extraction_result.get("extraction_confidence", {}).get("overall") or 0,
+                "extraction_log": json_dumps(extraction_result),
                 "created_date": datetime.now().strftime("%Y-%m-%d"),
                 "processed_date": datetime.now().strftime("%Y-%m-%d")
             }
@@ -308,18 +435,8 @@ class ERPNextAPI:
             # Add type-specific fields
             if document_type == "SoW":
                 # Map SoW type values to match doctype options
-                sow_type_mapping = {
-                    "Time & Material": "T&M",
-                    "Time and Material": "T&M", 
-                    "T&M": "T&M",
-                    "Retainer": "Retainer",
-                    "Fixed Cost": "Fixed Cost",
-                    "Fixed Price": "Fixed Cost",
-                    "Fixed": "Fixed Cost"
-                }
-                
-                raw_sow_type = type_specific_details.get("sow_type", "")
-                mapped_sow_type = sow_type_mapping.get(raw_sow_type, "T&M")  # Default to T&M
+                raw_sow_type = type_specific_details.get("sow_type") or ""
+                mapped_sow_type = SOW_TYPE_MAP.get(raw_sow_type.lower().strip(), "T&M")  # Default to T&M
                 
                 contract_data.update({
                     "contract_value": type_specific_details.get("total_contract_value"),
@@ -397,6 +514,36 @@ class ERPNextAPI:
             logger.error(f"Error updating records in ERPNext: {str(e)}")
             raise
     
+    async def _run_async(self, func, *args):
+        """
+        Run a blocking API method in a worker thread
+        
+        The call uses the shared pooled session, so concurrent calls overlap
+        their round trips; at most ERPNEXT_CONCURRENCY run at once.
+        """
+        async with self._async_semaphore:
+            return await asyncio.to_thread(func, *args)
+    
+    async def get_clients_async(self):
+        """Async variant of get_clients"""
+        return await self._run_async(self.get_clients)
+    
+    async def create_client_async(self, client_info):
+        """Async variant of create_client"""
+        return await self._run_async(self.create_client, client_info)
+    
+    async def create_contract_async(self, extraction_result, client_id, document_path):
+        """Async variant of create_contract"""
+        return await self._run_async(self.create_contract, extraction_result, client_id, document_path)
+    
+    async def update_records_async(self, extraction_result, client_mapping_result, document_path):
+        """Async variant of update_records"""
+        return await self._run_async(self.update_records, extraction_result, client_mapping_result, document_path)
+    
+    async def get_expiring_contracts_async(self, days_ahead=90):
+        """Async variant of get_expiring_contracts"""
+        return await self._run_async(self.get_expiring_contracts, days_ahead)
+    
     def get_expiring_contracts(self, days_ahead=90):
         """
         Get contracts that will expire within the specified number of days
@@ -427,13 +574,10 @@ class ERPNextAPI:
             }
             
             response = self._make_request("GET", "ContractCustom", params=params)
+            rows = response.get("data", [])
             
             contracts = []
-            for contract_data in response.get("data", []):
-                # Calculate days until expiration
-                expiration_date = parse_date(contract_data.get("expiration_date"))
-                days_until_expiration = (expiration_date - today).days if expiration_date else None
-                
+            for contract_data, days_until_expiration in zip(rows, self._days_until(rows, today)):
                 contract = {
                     "contract_id": contract_data.get("contract_id") or contract_data.get("name"),
                     "client_id": contract_data.get("client_id"),
@@ -450,4 +594,79 @@ class ERPNextAPI:
             
         except Exception as e:
             logger.error(f"Error getting expiring contracts from ERPNext: {str(e)}")
-            return [] 
\ No newline at end of file
+            return []
+    
+    def _days_until(self, rows, today):
+        """
+        Calculate days until expiration for a list of contract rows
+        
+        ERPNext returns ISO dates, so they are parsed and subtracted as one
+        NumPy datetime64 vector. Rows with other formats fall back to parse_date.
+        
+        Returns:
+            list: Days until expiration per row (None if the row has no date)
+        """
+        try:
+            expiration_dates = np.array(
+                [row.get("expiration_date") for row in rows], dtype="datetime64[D]"
+            )
+        except ValueError:
+            days = []
+            for row in rows:
+                expiration_date = parse_date(row.get("expiration_date"))
+                days.append((expiration_date - today).days if expiration_date else None)
+            return days
+        
+        days = (expiration_dates - np.datetime64(today, "D")).astype(np.int64).tolist()
+        missing = np.isnat(expiration_dates)
+        if missing.any():
+            days = [None if is_missing else d for d, is_missing in zip(days, missing.tolist())]
+        return days
+    
+    def get_contracts_expiring_on(self, target_date):
+        """
+        Get active contracts that expire exactly on the given date
+        
+        The date filter and field list are applied by ERPNext, so only the
+        matching rows and the columns needed for alerts are transferred.
+        
+        Args:
+            target_date (date): Expiration date to look for
+            
+        Returns:
+            list: List of contracts expiring on target_date
+        """
+        try:
+            params = {
+                "filters": json.dumps([
+                    ["expiration_date", "=", target_date.isoformat()],
+                    ["status", "=", "Active"]
+                ]),
+                "fields": json.dumps([
+                    "name", "contract_id", "client_id", "contract_type",
+                    "contract_name", "expiration_date"
+                ]),
+                "limit_page_length": 0
+            }
+            
+            response = self._make_request("GET", "ContractCustom", params=params)
+            
+            days_until_expiration = (target_date - datetime.now().date()).days
+            contracts = [
+                {
+                    "contract_id": contract_data.get("contract_id") or contract_data.get("name"),
+                    "client_id": contract_data.get("client_id"),
+                    "contract_type": contract_data.get("contract_type"),
+                    "contract_name": contract_data.get("contract_name"),
+                    "expiration_date": contract_data.get("expiration_date"),
+                    "days_until_expiration": days_until_expiration
+                }
+                for contract_data in response.get("data", [])
+            ]
+            
+            logger.info(f"Found {len(contracts)} contracts expiring on {target_date.isoformat()}")
+            return contracts
+            
+        except Exception as e:
+            logger.error(f"Error getting contracts expiring on {target_date} from ERPNext: {str(e)}")
+            return []
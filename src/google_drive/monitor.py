@@ -4,18 +4,28 @@ Google Drive integration for Contract Intelligence Agent
 This module handles the monitoring of Google Drive folders for new documents.
 """
 
+import io
 import os
+import dbm
+import time
+import queue
+import atexit
 import pickle
 import logging
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import mimetypes
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 
-from src.utils.config import Config
+# Backend for new processed-ID stores. dbm.open would pick dbm.sqlite3 on
+# Python 3.13+, whose connections only work in the thread that opened them
+try:
+    import dbm.gnu as processed_ids_dbm
+except ImportError:
+    import dbm.dumb as processed_ids_dbm
+
+from src.utils.config import get_config
 from src.utils.helpers import ensure_directory_exists
 
 # Logger setup
@@ -24,12 +34,45 @@ logger = logging.getLogger("contract_agent.google_drive")
 # Define scopes
 SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
 
+# Google only gzips responses for clients whose User-Agent contains "gzip"
+USER_AGENT = "contract-agent (gzip)"
+
+# Maximum page size allowed by files.list
+LIST_PAGE_SIZE = 1000
+
+# Downloaded chunks buffered between the network reader and the disk writer
+STREAM_QUEUE_SIZE = 4
+
+# Minimum seconds between flushes of the processed-ID store to disk
+PROCESSED_IDS_FLUSH_INTERVAL = 5.0
+
+# Keys in the processed-ID store holding polling state; ':' never occurs in Drive IDs
+LAST_POLL_KEY = b"meta:last_poll_time"
+LAST_FULL_SCAN_KEY = b"meta:last_full_scan"
+
+# Overlap between polls, covering clock skew and files still being uploaded
+POLL_OVERLAP = timedelta(minutes=5)
+
+# How often the whole folder is listed; files moved into it keep their old modifiedTime
+FULL_SCAN_INTERVAL = timedelta(days=1)
+
+# Timestamp format of Drive's modifiedTime, so timestamps compare as strings
+DRIVE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.000Z"
+
+# Load the MIME type tables now rather than on the first download
+mimetypes.init()
+
+@lru_cache(maxsize=None)
+def _guess_extension(mime_type):
+    """Cached mimetypes.guess_extension; Drive only reports a handful of MIME types"""
+    return mimetypes.guess_extension(mime_type)
+
 class GoogleDriveMonitor:
     """Monitor Google Drive for new documents"""
     
     def __init__(self):
         """Initialize the Google Drive monitor with configuration"""
-        self.config = Config()
+        self.config = get_config()
         self.credentials_file = self.config.credentials_file
         self.token_file = self.config.token_file
         self.folder_id = self.config.watch_folder_id
@@ -42,17 +85,33 @@ class GoogleDriveMonitor:
         self.data_dir = os.path.join(os.getcwd(), "data")
         ensure_directory_exists(self.data_dir)
         
-        # File to store processed document IDs
-        self.processed_ids_file = os.path.join(self.data_dir, "processed_documents.pickle")
+        # Key-value store of processed document IDs; replaces the pickled set
+        self.processed_ids_file = os.path.join(self.data_dir, "processed_documents.db")
+        self.legacy_processed_ids_file = os.path.join(self.data_dir, "processed_documents.pickle")
+        self._processed_lock = threading.Lock()
+        
+        # Initialize the Drive API client; each thread gets its own service.
+        # Done before opening the store, so a credential failure leaves nothing open
+        self._creds = self._get_credentials()
+        self._thread_local = threading.local()
+        self.drive_service = self._service()
         
-        # Load previously processed document IDs
-        self.processed_ids = self._load_processed_ids()
+        # Worker threads for parallel downloads, kept across cycles so their
+        # Drive services and connections are reused; created on first use
+        self._executor = None
+        self._executor_lock = threading.Lock()
         
-        # Initialize the Drive API client
-        self.drive_service = self._get_drive_service()
+        # Open the store, importing IDs from the old pickle file if present
+        self._db = self._open_processed_ids()
+        
+        # Marks are flushed at most every PROCESSED_IDS_FLUSH_INTERVAL seconds,
+        # and once more when the process exits
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        atexit.register(self.close)
     
-    def _get_drive_service(self):
-        """Initialize and authenticate the Google Drive API service"""
+    def _get_credentials(self):
+        """Load, refresh or obtain the Google Drive API credentials"""
         creds = None
         
         # Check if token file exists
@@ -63,80 +122,212 @@ class GoogleDriveMonitor:
         # If credentials not valid, refresh or get new ones
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
+                from google.auth.transport.requests import Request
                 creds.refresh(Request())
             else:
+                from google_auth_oauthlib.flow import InstalledAppFlow
                 flow = InstalledAppFlow.from_client_secrets_file(
                     self.credentials_file, SCOPES)
                 creds = flow.run_local_server(port=0)
             
             # Save the credentials for the next run
             with open(self.token_file, 'wb') as token:
-                pickle.dump(creds, token)
+                pickle.dump(creds, token, protocol=pickle.HIGHEST_PROTOCOL)
         
-        # Build the service
-        return build('drive', 'v3', credentials=creds)
+        return creds
     
-    def _load_processed_ids(self):
-        """Load the list of already processed document IDs"""
-        if os.path.exists(self.processed_ids_file):
+    def _get_drive_service(self, creds):
+        """Build a Google Drive API service from credentials"""
+        # The Google client libraries are slow to import, so they are only
+        # loaded once the monitor actually talks to Drive
+        import httplib2
+        import google_auth_httplib2
+        from googleapiclient.discovery import build
+        from googleapiclient.http import set_user_agent
+        
+        # Each service has its own HTTP connection, which is not thread-safe
+        http = set_user_agent(httplib2.Http(), USER_AGENT)
+        
+        # Use the discovery document bundled with googleapiclient, so building a
+        # service never fetches it over the network; the file cache is not needed
+        return build(
+            'drive', 'v3',
+            http=google_auth_httplib2.AuthorizedHttp(creds, http=http),
+            static_discovery=True,
+            cache_discovery=False
+        )
+    
+    def _service(self):
+        """Return the calling thread's Drive service, building it on first use"""
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            # Credentials are shared; the HTTP connection is reused for the thread's lifetime
+            service = self._thread_local.service = self._get_drive_service(self._creds)
+        return service
+    
+    def _open_processed_ids(self):
+        """Open the processed document ID store, migrating the legacy pickle file"""
+        kind = dbm.whichdb(self.processed_ids_file)
+        if kind in ("dbm.gnu", "dbm.ndbm", "dbm.dumb"):
+            # Existing store in a backend that can be shared between threads
+            db = dbm.open(self.processed_ids_file, 'w')
+        elif kind == "dbm.sqlite3":
+            # Created by dbm.open on Python 3.13+; copy it into a thread-safe store
+            sqlite_file = self.processed_ids_file + ".sqlite3"
+            os.replace(self.processed_ids_file, sqlite_file)
+            db = processed_ids_dbm.open(self.processed_ids_file, 'c')
+            with dbm.open(sqlite_file, 'r') as old_db:
+                for key in old_db.keys():
+                    db[key] = old_db[key]
+            self._sync_db(db)
+        else:
+            db = processed_ids_dbm.open(self.processed_ids_file, 'c')
+        
+        if os.path.exists(self.legacy_processed_ids_file):
             try:
-                with open(self.processed_ids_file, 'rb') as f:
-                    return pickle.load(f)
-            except Exception as e:
-                logger.error(f"Error loading processed document IDs: {str(e)}")
+                with open(self.legacy_processed_ids_file, 'rb') as f:
+                    legacy_ids = pickle.load(f)
+                for document_id in legacy_ids:
+                    db[document_id] = b'1'
+                self._sync_db(db)
+                
+                # Keep the old file around, but never import it twice
+                os.replace(self.legacy_processed_ids_file, self.legacy_processed_ids_file + ".migrated")
+                logger.info(f"Migrated {len(legacy_ids)} processed document IDs to {self.processed_ids_file}")
+            except Exception:
+                logger.exception("Error migrating processed document IDs")
         
-        # Return empty set if file doesn't exist or error occurred
-        return set()
+        return db
     
-    def _save_processed_ids(self):
-        """Save the list of processed document IDs"""
-        try:
-            with open(self.processed_ids_file, 'wb') as f:
-                pickle.dump(self.processed_ids, f)
-        except Exception as e:
-            logger.error(f"Error saving processed document IDs: {str(e)}")
+    def _sync_db(self, db):
+        """Flush the ID store to disk, if the dbm backend buffers writes"""
+        sync = getattr(db, "sync", None)
+        if sync is not None:
+            sync()
+    
+    def flush(self):
+        """Write pending processed-ID marks to disk"""
+        with self._processed_lock:
+            if self._dirty:
+                self._sync_db(self._db)
+                self._dirty = False
+            self._last_flush = time.monotonic()
+    
+    def _get_state(self, key):
+        """Read a polling state value from the processed-ID store"""
+        with self._processed_lock:
+            value = self._db[key] if key in self._db else None
+        return value.decode() if value is not None else None
+    
+    def _set_state(self, values):
+        """Write polling state values to the processed-ID store"""
+        with self._processed_lock:
+            for key, value in values.items():
+                self._db[key] = value.encode()
+            self._dirty = True
+        self.flush()
+    
+    def close(self):
+        """Flush and close the processed-ID store and stop the download workers"""
+        atexit.unregister(self.close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._processed_lock:
+            if self._db is None:
+                return
+            if self._dirty:
+                self._sync_db(self._db)
+                self._dirty = False
+            self._db.close()
+            self._db = None
+    
+    def is_processed(self, document_id):
+        """Check whether a document ID has already been processed"""
+        with self._processed_lock:
+            return document_id.encode() in self._db
     
     def get_new_documents(self):
         """
         Get a list of new documents in the monitored folder
         
+        Only files modified since the previous poll are listed, so the response
+        stays small as the folder grows. The watermark never moves past a
+        document that is still unprocessed, so failed downloads are listed
+        again on the next poll. The whole folder is listed every
+        FULL_SCAN_INTERVAL to pick up files moved in with an old modifiedTime.
+        
         Returns:
             list: List of document metadata for new documents
         """
+        from googleapiclient.errors import HttpError
+        
         try:
+            now = datetime.now(timezone.utc)
+            last_poll_time = self._get_state(LAST_POLL_KEY)
+            last_full_scan = self._get_state(LAST_FULL_SCAN_KEY)
+            full_scan = (
+                last_poll_time is None
+                or last_full_scan is None
+                or last_full_scan < (now - FULL_SCAN_INTERVAL).strftime(DRIVE_TIME_FORMAT)
+            )
+            
             # Query for files in the specified folder
             query = f"'{self.folder_id}' in parents and trashed = false"
-            fields = "files(id, name, mimeType, createdTime, modifiedTime)"
-            
-            results = self.drive_service.files().list(
-                q=query,
-                spaces='drive',
-                fields=fields
-            ).execute()
+            if not full_scan:
+                query += f" and modifiedTime >= '{last_poll_time}'"
+            fields = "nextPageToken, files(id, name, mimeType, createdTime, modifiedTime)"
             
-            items = results.get('files', [])
+            items = []
+            page_token = None
+            while True:
+                results = self._service().files().list(
+                    q=query,
+                    spaces='drive',
+                    fields=fields,
+                    pageSize=LIST_PAGE_SIZE,
+                    pageToken=page_token
+                ).execute()
+                
+                items.extend(results.get('files', []))
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
             
             # Filter for new documents (not processed before)
-            new_documents = [doc for doc in items if doc['id'] not in self.processed_ids]
+            new_documents = [doc for doc in items if not self.is_processed(doc['id'])]
             
-            logger.info(f"Found {len(new_documents)} new documents out of {len(items)} total")
+            # Next poll starts from the oldest unprocessed document, or from now
+            watermark = min(
+                [(now - POLL_OVERLAP).strftime(DRIVE_TIME_FORMAT)]
+                + [doc['modifiedTime'] for doc in new_documents if doc.get('modifiedTime')]
+            )
+            state = {LAST_POLL_KEY: watermark}
+            if full_scan:
+                state[LAST_FULL_SCAN_KEY] = now.strftime(DRIVE_TIME_FORMAT)
+            self._set_state(state)
+            
+            scope = "total" if full_scan else f"modified since {last_poll_time}"
+            logger.info(f"Found {len(new_documents)} new documents out of {len(items)} {scope}")
             
             return new_documents
             
-        except HttpError as error:
-            logger.error(f"Error accessing Google Drive API: {str(error)}")
+        except HttpError:
+            logger.exception("Error accessing Google Drive API")
             return []
     
-    def download_document(self, document):
+    def download_document(self, document, drive_service=None):
         """
         Download a document from Google Drive
         
         Args:
             document (dict): Document metadata from the API
+            drive_service: Drive API service to use; defaults to the calling thread's
             
         Returns:
             str: Path to the downloaded file
         """
+        drive_service = drive_service or self._service()
         try:
             file_id = document['id']
             file_name = document['name']
@@ -144,38 +335,129 @@ class GoogleDriveMonitor:
             # Generate timestamp for unique filename
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
             
-            # Determine file extension
-            mime_type = document.get('mimeType', '')
-            extension = mimetypes.guess_extension(mime_type)
-            
-            if not extension and '.' in file_name:
-                extension = file_name.split('.')[-1]
-                if extension:
-                    extension = f".{extension}"
+            # Determine file extension, falling back to the one in the file name
+            stem, name_extension = os.path.splitext(file_name)
+            extension = _guess_extension(document.get('mimeType', '')) or name_extension
             
             # Create download path
             download_path = os.path.join(
                 self.download_dir, 
-                f"{file_name.split('.')[0]}_{timestamp}{extension}"
+                f"{stem}_{timestamp}{extension}"
             )
             
             # Download the file
-            request = self.drive_service.files().get_media(fileId=file_id)
+            from googleapiclient.http import MediaIoBaseDownload
+            request = drive_service.files().get_media(fileId=file_id)
             
-            with open(download_path, 'wb') as f:
-                downloader = MediaIoBaseDownload(f, request)
-                done = False
-                while not done:
-                    status, done = downloader.next_chunk()
+            if self.config.drive_stream_downloads:
+                self._stream_download(request, download_path, file_name)
+            else:
+                with open(download_path, 'wb') as f:
+                    # Larger chunks mean fewer round trips per file; chunks are written straight to f
+                    downloader = MediaIoBaseDownload(f, request, chunksize=self.config.download_chunk_size)
+                    done = False
+                    while not done:
+                        status, done = downloader.next_chunk()
+                        if status:
+                            logger.debug(f"Downloading {file_name}: {int(status.progress() * 100)}%")
             
             logger.info(f"Downloaded {file_name} to {download_path}")
             
             return download_path
             
-        except Exception as e:
-            logger.error(f"Error downloading document {document.get('name', 'unknown')}: {str(e)}")
+        except Exception:
+            logger.exception(f"Error downloading document {document.get('name', 'unknown')}")
             raise
     
+    def _stream_download(self, request, path, file_name):
+        """
+        Download a media request to a file, overlapping network reads and disk writes
+        
+        The calling thread fetches chunks and hands them to a writer thread
+        through a bounded queue, so the next chunk is requested while the
+        previous one is being written.
+        
+        Args:
+            request: Drive API media request
+            path (str): Destination file path
+            file_name (str): Document name, for log messages
+        """
+        from googleapiclient.http import MediaIoBaseDownload
+        
+        chunks = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+        write_errors = []
+        
+        def _writer():
+            try:
+                with open(path, 'wb') as f:
+                    while (chunk := chunks.get()) is not None:
+                        f.write(chunk)
+            except Exception as e:
+                write_errors.append(e)
+                # Keep draining so the reader never blocks on a full queue
+                while chunks.get() is not None:
+                    pass
+        
+        writer = threading.Thread(target=_writer, name="drive-download-writer", daemon=True)
+        writer.start()
+        
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, request, chunksize=self.config.download_chunk_size)
+        try:
+            done = False
+            while not done and not write_errors:
+                status, done = downloader.next_chunk()
+                chunks.put(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if status:
+                    logger.debug(f"Downloading {file_name}: {int(status.progress() * 100)}%")
+        finally:
+            # The sentinel ends the writer, also when the download failed
+            chunks.put(None)
+            writer.join()
+        
+        if write_errors:
+            raise write_errors[0]
+    
+    def _get_executor(self):
+        """Get the monitor's worker pool, sized by DRIVE_MAX_CONCURRENT_DOWNLOADS"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.config.drive_max_concurrent_downloads,
+                    thread_name_prefix="drive-download"
+                )
+            return self._executor
+    
+    def download_documents(self, documents):
+        """
+        Download several documents from Google Drive in parallel
+        
+        Each worker thread uses its own Drive service (see _service), since
+        the underlying HTTP client is not thread-safe. The workers live as
+        long as the monitor, so their connections are reused across cycles.
+        
+        Args:
+            documents (list): Document metadata from the API
+            
+        Returns:
+            list: Path to each downloaded file, in the order of documents;
+                None for documents that failed to download
+        """
+        executor = self._get_executor()
+        
+        paths = [None] * len(documents)
+        futures = {executor.submit(self.download_document, document): i for i, document in enumerate(documents)}
+        for future in as_completed(futures):
+            try:
+                paths[futures[future]] = future.result()
+            except Exception:
+                # download_document has already logged the error
+                pass
+        
+        return paths
+    
     def mark_as_processed(self, document):
         """
         Mark a document as processed
@@ -184,16 +466,20 @@ class GoogleDriveMonitor:
             document (dict): Document metadata
         """
         try:
-            # Add document ID to processed set
-            self.processed_ids.add(document['id'])
+            # Record the document ID; a single-key write, not a rewrite of all IDs
+            with self._processed_lock:
+                self._db[document['id']] = b'1'
+                self._dirty = True
+                flush_due = time.monotonic() - self._last_flush > PROCESSED_IDS_FLUSH_INTERVAL
             
-            # Save updated processed IDs
-            self._save_processed_ids()
+            # Syncing after every mark would hit the disk once per document
+            if flush_due:
+                self.flush()
             
             logger.debug(f"Marked document {document['name']} as processed")
             
-        except Exception as e:
-            logger.error(f"Error marking document as processed: {str(e)}")
+        except Exception:
+            logger.exception("Error marking document as processed")
     
     def get_document_content(self, document_id):
         """
@@ -207,13 +493,29 @@ class GoogleDriveMonitor:
         """
         try:
             # Get the document content
-            doc = self.drive_service.files().export(
+            doc = self._service().files().export(
                 fileId=document_id,
                 mimeType='text/plain'
             ).execute()
             
             return doc.decode('utf-8')
             
-        except Exception as e:
-            logger.error(f"Error getting document content: {str(e)}")
-            return None 
\ No newline at end of file
+        except Exception:
+            logger.exception("Error getting document content")
+            return None 
+    
+    def get_document_contents(self, document_ids):
+        """
+        Get the content of several Google Docs in parallel
+        
+        Exports run on the download worker pool, each thread with its own
+        Drive service and connection (see download_documents).
+        
+        Args:
+            document_ids (list): Google Document IDs
+            
+        Returns:
+            dict: Document ID to content as text; None for failed exports
+        """
+        executor = self._get_executor()
+        return dict(zip(document_ids, executor.map(self.get_document_content, document_ids))) 
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Shared key/value cache for the Contract Intelligence Agent
+
+Values are stored as JSON in Redis when REDIS_URL is configured, so every
+worker process shares them. Without Redis they are kept in this process only.
+The cache fails open: Redis errors are logged and treated as cache misses.
+"""
+
+import time
+import logging
+import threading
+from functools import lru_cache
+
+import orjson
+
+from src.utils.singletons import get_config
+
+# Logger setup
+logger = logging.getLogger("contract_agent.utils")
+
+# Keys for the ERPNext client list and its normalized match index
+CLIENTS_KEY = "erpnext:clients:v1"
+CLIENTS_INDEX_KEY = "erpnext:clients:normalized:v4"
+
+# In-process fallback used when Redis is not configured: key -> (expires_at, payload)
+_local_cache = {}
+_local_lock = threading.Lock()
+
+@lru_cache(maxsize=1)
+def _get_redis():
+    """Get the Redis client, or None when Redis is not configured or installed"""
+    redis_url = get_config().redis_url
+    if not redis_url:
+        return None
+    
+    try:
+        import redis
+    except ImportError:
+        logger.warning("REDIS_URL is set but the redis package is not installed; using in-process cache")
+        return None
+    
+    return redis.Redis.from_url(redis_url)
+
+def _dumps(value):
+    return orjson.dumps(value)
+
+def _loads(payload):
+    return orjson.loads(payload)
+
+def get_json(key):
+    """
+    Get a cached value
+    
+    Args:
+        key (str): Cache key
+        
+    Returns:
+        The cached value, or None on a miss or cache error
+    """
+    client = _get_redis()
+    
+    if client is None:
+        with _local_lock:
+            entry = _local_cache.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        payload = entry[1]
+    else:
+        try:
+            payload = client.get(key)
+        except Exception as e:
+            logger.warning(f"Error reading {key} from Redis: {str(e)}")
+            return None
+        if payload is None:
+            return None
+    
+    return _loads(payload)
+
+def set_json(key, value, ttl):
+    """
+    Cache a JSON-serializable value
+    
+    Args:
+        key (str): Cache key
+        value: Value to cache
+        ttl (int): Time to live in seconds
+    """
+    payload = _dumps(value)
+    client = _get_redis()
+    
+    if client is None:
+        with _local_lock:
+            _local_cache[key] = (time.monotonic() + ttl, payload)
+        return
+    
+    try:
+        client.set(key, payload, ex=int(ttl))
+    except Exception as e:
+        logger.warning(f"Error writing {key} to Redis: {str(e)}")
+
+def add(key, value, ttl):
+    """
+    Cache a value only if the key is not already cached (atomic with Redis)
+    
+    Args:
+        key (str): Cache key
+        value: Value to cache
+        ttl (int): Time to live in seconds
+        
+    Returns:
+        bool: True if the key was set, False if it already existed. Cache
+            errors return True, so callers fail open.
+    """
+    payload = _dumps(value)
+    client = _get_redis()
+    
+    if client is None:
+        now = time.monotonic()
+        with _local_lock:
+            entry = _local_cache.get(key)
+            if entry is not None and entry[0] > now:
+                return False
+            _local_cache[key] = (now + ttl, payload)
+        return True
+    
+    try:
+        return bool(client.set(key, payload, ex=int(ttl), nx=True))
+    except Exception as e:
+        logger.warning(f"Error writing {key} to Redis: {str(e)}")
+        return True
+
+def delete(*keys):
+    """Remove keys from the cache"""
+    client = _get_redis()
+    
+    if client is None:
+        with _local_lock:
+            for key in keys:
+                _local_cache.pop(key, None)
+        return
+    
+    try:
+        client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Error deleting {', '.join(keys)} from Redis: {str(e)}")
+
+def invalidate_clients():
+    """Drop the cached client list, e.g. after a client is created in ERPNext"""
+    delete(CLIENTS_KEY, CLIENTS_INDEX_KEY)
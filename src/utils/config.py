@@ -6,6 +6,8 @@ This module handles loading and validating configuration from environment variab
 
 import os
 import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,35 +16,83 @@ load_dotenv()
 # Logger setup
 logger = logging.getLogger("contract_agent.utils")
 
+def _env(name, default=None, cast=str, secret=False):
+    """Field default factory reading an environment variable, converted with cast"""
+    def _read():
+        value = os.getenv(name, default)
+        return None if value is None else cast(value)
+    # Secrets are kept out of the repr so a logged Config never leaks them
+    return field(default_factory=_read, repr=not secret)
+
+def _env_flag(name, default):
+    """Field default factory for a "true"/"false" environment variable"""
+    return _env(name, default, lambda value: value.lower() == "true")
+
+def _env_days(name, default, sort=False):
+    """Field default factory for a comma-separated list of day counts"""
+    def _parse(value):
+        days = tuple(int(day) for day in value.split(","))
+        return tuple(sorted(days)) if sort else days
+    return _env(name, default, _parse)
+
+@dataclass(frozen=True, slots=True)
 class Config:
-    """Configuration class that loads and validates config from environment variables"""
+    """
+    Configuration loaded from environment variables and validated once
     
-    def __init__(self):
-        """Initialize configuration by loading from environment variables"""
-        # Google Drive configuration
-        self.credentials_file = os.getenv("GOOGLE_DRIVE_CREDENTIALS_FILE", "credentials.json")
-        self.token_file = os.getenv("GOOGLE_DRIVE_TOKEN_FILE", "token.json")
-        self.watch_folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
-        
-        # ERPNext configuration
-        self.erpnext_url = os.getenv("ERPNEXT_URL")
-        self.erpnext_api_key = os.getenv("ERPNEXT_API_KEY")
-        self.erpnext_api_secret = os.getenv("ERPNEXT_API_SECRET")
-        
-        # Google Gemini configuration
-        self.google_ai_api_key = os.getenv("GOOGLE_AI_API_KEY")
-        
-        # Client mapping configuration
-        self.fuzzy_match_threshold = float(os.getenv("FUZZY_MATCH_THRESHOLD", "80.0"))
-        self.client_mapping_confidence_threshold = float(os.getenv("CLIENT_MAPPING_CONFIDENCE_THRESHOLD", "0.75"))
-        
-        # Document processing configuration
-        self.extraction_confidence_threshold = float(os.getenv("EXTRACTION_CONFIDENCE_THRESHOLD", "0.7"))
-        
-        # Alert configuration
-        self.alert_periods = [int(days) for days in os.getenv("ALERT_PERIODS", "90,60,30,14,7").split(",")]
-        
-        # Validate configuration
+    Instances are immutable; use get_config() to share a single instance
+    instead of re-reading the environment.
+    """
+    
+    # Google Drive configuration
+    credentials_file: str = _env("GOOGLE_DRIVE_CREDENTIALS_FILE", "credentials.json")
+    token_file: str = _env("GOOGLE_DRIVE_TOKEN_FILE", "token.json")
+    watch_folder_id: str = _env("GOOGLE_DRIVE_FOLDER_ID")
+    drive_max_concurrent_downloads: int = _env("DRIVE_MAX_CONCURRENT_DOWNLOADS", "4", int)
+    download_chunk_size: int = _env("DRIVE_DOWNLOAD_CHUNK_SIZE", str(8 * 1024 * 1024), int)
+    # Write downloaded chunks on a separate thread while the next chunk is fetched
+    drive_stream_downloads: bool = _env_flag("DRIVE_STREAM_DOWNLOADS", "true")
+    
+    # ERPNext configuration
+    erpnext_url: str = _env("ERPNEXT_URL")
+    erpnext_api_key: str = _env("ERPNEXT_API_KEY", secret=True)
+    erpnext_api_secret: str = _env("ERPNEXT_API_SECRET", secret=True)
+    # Only enable if the server (or its proxy) decodes gzip-encoded request bodies
+    erpnext_gzip_requests: bool = _env_flag("ERPNEXT_GZIP_REQUESTS", "false")
+    erpnext_concurrency: int = _env("ERPNEXT_CONCURRENCY", "20", int)
+    # Append every ERPNext request/response to erpnext_logs/transactions-YYYYMMDD.jsonl
+    erpnext_log_requests: bool = _env_flag("ERPNEXT_LOG_REQUESTS", "true")
+    
+    # Google Gemini configuration
+    google_ai_api_key: str = _env("GOOGLE_AI_API_KEY", secret=True)
+    gemini_model: str = _env("GEMINI_MODEL", "", lambda value: value or "gemini-2.0-flash")
+    
+    # Client mapping configuration
+    fuzzy_match_threshold: float = _env("FUZZY_MATCH_THRESHOLD", "80.0", float)
+    client_mapping_confidence_threshold: float = _env("CLIENT_MAPPING_CONFIDENCE_THRESHOLD", "0.75", float)
+    
+    # Document processing configuration
+    extraction_confidence_threshold: float = _env("EXTRACTION_CONFIDENCE_THRESHOLD", "0.7", float)
+    extraction_cache_enabled: bool = _env_flag("EXTRACTION_CACHE_ENABLED", "true")
+    # Reuse extractions of near-duplicate documents (needs sentence-transformers and faiss)
+    semantic_cache_enabled: bool = _env_flag("SEMANTIC_CACHE_ENABLED", "false")
+    semantic_cache_threshold: float = _env("SEMANTIC_CACHE_THRESHOLD", "0.95", float)
+    llm_max_concurrency: int = _env("LLM_MAX_CONCURRENCY", "8", int)
+    # PDF text extraction library: "pypdfium2" (falls back to PyPDF2 on failure) or "pypdf2"
+    pdf_backend: str = _env("PDF_BACKEND", "pypdfium2", str.lower)
+    # Worker processes for text extraction in the async path; 0 extracts in threads instead
+    extraction_processes: int = _env("EXTRACTION_PROCESSES", str(os.cpu_count() or 1), int)
+    
+    # Shared cache configuration (optional, falls back to an in-process cache)
+    redis_url: str = _env("REDIS_URL")
+    
+    # Alert configuration
+    alert_periods: tuple = _env_days("ALERT_PERIODS", "90,60,30,14,7")
+    # Days until expiration at or below which alerts are high / medium priority
+    alert_priority_thresholds: tuple = _env_days("ALERT_PRIORITY_THRESHOLDS", "30,60", sort=True)
+    
+    def __post_init__(self):
+        """Validate configuration once all fields are loaded"""
         self._validate_config()
     
     def _validate_config(self):
@@ -55,14 +105,22 @@ class Config:
             "google_ai_api_key"
         ]
         
-        for field in required_fields:
-            if not getattr(self, field):
-                logger.warning(f"Missing required configuration: {field}")
+        for field_name in required_fields:
+            if not getattr(self, field_name):
+                logger.warning(f"Missing required configuration: {field_name}")
         
         # Check credentials file exists
         if not os.path.exists(self.credentials_file):
             logger.warning(f"Google Drive credentials file not found: {self.credentials_file}")
             
+        if len(self.alert_priority_thresholds) != 2:
+            logger.warning(f"ALERT_PRIORITY_THRESHOLDS should have 2 values (high,medium), got {list(self.alert_priority_thresholds)}")
+        
         # Log non-critical configs
         if self.fuzzy_match_threshold < 50.0:
-            logger.warning(f"Fuzzy match threshold {self.fuzzy_match_threshold} is low, may cause false matches") 
\ No newline at end of file
+            logger.warning(f"Fuzzy match threshold {self.fuzzy_match_threshold} is low, may cause false matches")
+
+@lru_cache(maxsize=1)
+def get_config():
+    """Get the shared Config instance, loaded from the environment on first use"""
+    return Config() 
\ No newline at end of file
@@ -3,24 +3,122 @@ Helper utilities for the Contract Intelligence Agent
 """
 
 import os
-import json
+import time
 import logging
-from datetime import datetime, date
+import threading
+from pathlib import Path
+from functools import lru_cache
+from datetime import datetime
 import re
+import orjson
+from colorama import Fore, Style, init
+
+# Initialize colorama
+init()
 
 logger = logging.getLogger("contract_agent.utils")
 
+# Legal entity designations and punctuation removed by normalize_client_name
+_ENTITY_RE = re.compile(
+    r"\s+(?:inc|incorporated|corp|corporation|llc|l\.l\.c|ltd|limited|gmbh|co|company)\.?(?=[\s,]|$)"
+)
+_PUNCTUATION = str.maketrans("", "", ",.")
+
+# Characters removed from date strings before parsing (everything but word chars, spaces, - and /)
+_DATE_CLEAN = re.compile(r'[^\w\s\-\/]')
+
+# Date formats accepted by parse_date, grouped by delimiter. Commas are removed
+# by _DATE_CLEAN, so "January 15, 2023" is parsed as "January 15 2023".
+_DATE_FORMATS = {
+    '-': (
+        '%Y-%m-%d',      # 2023-01-15
+        '%d-%m-%Y',      # 15-01-2023
+        '%m-%d-%Y',      # 01-15-2023
+    ),
+    '/': (
+        '%Y/%m/%d',      # 2023/01/15
+        '%d/%m/%Y',      # 15/01/2023
+        '%m/%d/%Y',      # 01/15/2023
+    ),
+    ' ': (
+        '%B %d %Y',      # January 15, 2023
+        '%d %B %Y',      # 15 January 2023
+        '%b %d %Y',      # Jan 15, 2023
+        '%d %b %Y',      # 15 Jan 2023
+    ),
+}
+
+# State for unique_timestamp, shared by all threads in the process
+_timestamp_lock = threading.Lock()
+_last_second = None
+_last_timestamp = None
+_timestamp_sequence = 0
+
+class ColoredFormatter(logging.Formatter):
+    """
+    Formatter that colors the log message by level
+    
+    Only the formatted text is colored; the record itself is left untouched,
+    so other handlers (e.g. the log file) still get the plain message.
+    """
+    
+    COLORS = {
+        logging.DEBUG: Fore.BLUE,
+        logging.INFO: Fore.GREEN,
+        logging.WARNING: Fore.YELLOW,
+        logging.ERROR: Fore.RED,
+        logging.CRITICAL: Fore.RED + Style.BRIGHT
+    }
+    
+    def formatMessage(self, record):
+        color = self.COLORS.get(record.levelno)
+        if color is None:
+            return super().formatMessage(record)
+        
+        # record.message is recomputed by every formatter, so replacing it is safe
+        message = record.message
+        record.message = f"{color}{message}{Style.RESET_ALL}"
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.message = message
+
+def create_log_handler(fmt):
+    """
+    Create a stderr log handler, colored only when stderr is a terminal
+    
+    Args:
+        fmt (str): Log format string
+        
+    Returns:
+        logging.StreamHandler: Configured handler
+    """
+    handler = logging.StreamHandler()
+    stream_is_tty = getattr(handler.stream, "isatty", None)
+    if stream_is_tty is not None and stream_is_tty():
+        handler.setFormatter(ColoredFormatter(fmt))
+    else:
+        handler.setFormatter(logging.Formatter(fmt))
+    return handler
+
 def ensure_directory_exists(directory_path):
     """Ensure that a directory exists, creating it if necessary"""
-    if not os.path.exists(directory_path):
-        os.makedirs(directory_path)
+    # A single mkdir call; an existing directory shows up as FileExistsError
+    try:
+        Path(directory_path).mkdir(parents=True)
         logger.info(f"Created directory: {directory_path}")
+    except FileExistsError:
+        pass
 
 def save_json(data, filepath):
     """Save data as JSON to a file"""
     try:
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2, default=json_serializer)
+        # orjson serializes datetime, date and numpy values natively
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(
+                data,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+            ))
         return True
     except Exception as e:
         logger.error(f"Error saving JSON to {filepath}: {str(e)}")
@@ -33,17 +131,23 @@ def load_json(filepath):
             logger.warning(f"JSON file not found: {filepath}")
             return None
         
-        with open(filepath, 'r') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
     except Exception as e:
         logger.error(f"Error loading JSON from {filepath}: {str(e)}")
         return None
 
-def json_serializer(obj):
-    """JSON serializer for objects not serializable by default json code"""
-    if isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+def json_loads(data):
+    """Parse JSON from a str or bytes; raises json.JSONDecodeError on invalid input"""
+    return orjson.loads(data)
+
+def json_dumps(data):
+    """Serialize data as a compact JSON string"""
+    return orjson.dumps(data).decode()
+
+def to_json_line(data):
+    """Serialize data as a single compact JSON line (JSONL), newline included"""
+    return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE).decode()
 
 def parse_date(date_string):
     """
@@ -54,29 +158,28 @@ def parse_date(date_string):
         return None
     
     # Remove any non-alphanumeric characters except for / and -
-    date_string = re.sub(r'[^\w\s\-\/]', '', date_string.strip())
+    date_string = _DATE_CLEAN.sub('', date_string.strip())
     
-    # Try various date formats
-    formats = [
-        '%Y-%m-%d',      # 2023-01-15
-        '%d-%m-%Y',      # 15-01-2023
-        '%m-%d-%Y',      # 01-15-2023
-        '%Y/%m/%d',      # 2023/01/15
-        '%d/%m/%Y',      # 15/01/2023
-        '%m/%d/%Y',      # 01/15/2023
-        '%B %d, %Y',     # January 15, 2023
-        '%d %B %Y',      # 15 January 2023
-        '%b %d, %Y',     # Jan 15, 2023
-        '%d %b %Y',      # 15 Jan 2023
-    ]
+    parsed = _parse_clean_date(date_string)
+    if parsed is None:
+        logger.warning(f"Could not parse date: {date_string}")
+    return parsed
+
+@lru_cache(maxsize=4096)
+def _parse_clean_date(date_string):
+    """Parse a cleaned date string, trying only the formats for its delimiter"""
+    if '-' in date_string:
+        formats = _DATE_FORMATS['-']
+    elif '/' in date_string:
+        formats = _DATE_FORMATS['/']
+    else:
+        formats = _DATE_FORMATS[' ']
     
     for fmt in formats:
         try:
             return datetime.strptime(date_string, fmt).date()
         except ValueError:
             continue
-    
-    logger.warning(f"Could not parse date: {date_string}")
     return None
 
 def calculate_days_between(start_date, end_date):
@@ -95,6 +198,34 @@ def calculate_days_between(start_date, end_date):
     
     return (end_date - start_date).days
 
+def unique_timestamp():
+    """
+    Return a %Y%m%d%H%M%S timestamp that is unique within the process.
+    Documents are processed concurrently, so several records can be created
+    within the same second; those get a -1, -2, ... suffix. The formatted
+    timestamp is cached so strftime runs at most once per second.
+    """
+    global _last_second, _last_timestamp, _timestamp_sequence
+    
+    with _timestamp_lock:
+        # Read the clock under the lock, and never go back to an earlier second
+        # (a preempted caller or a clock step would otherwise repeat a timestamp)
+        second = int(time.time())
+        if _last_second is not None and second <= _last_second:
+            _timestamp_sequence += 1
+            return f"{_last_timestamp}-{_timestamp_sequence}"
+        _last_second = second
+        _last_timestamp = datetime.fromtimestamp(second).strftime("%Y%m%d%H%M%S")
+        _timestamp_sequence = 0
+        return _last_timestamp
+
+@lru_cache(maxsize=4096)
+def normalize_client_name(name):
+    """Normalize a client name for matching (lowercase, no legal entity suffixes or punctuation)"""
+    if not name:
+        return ""
+    return _ENTITY_RE.sub("", name.lower()).translate(_PUNCTUATION).strip()
+
 def get_file_extension(file_path):
     """Get the file extension from a path"""
     _, ext = os.path.splitext(file_path)
@@ -0,0 +1,20 @@
+"""
+Process-wide shared instances for the Contract Intelligence Agent
+
+Components that only need configuration or ERPNext access get them from here,
+so every alert, mapping and document in the process reuses the same objects.
+"""
+
+from functools import lru_cache
+
+# The shared Config lives next to the class; re-exported for existing importers
+from src.utils.config import get_config
+
+__all__ = ["get_config", "get_erpnext_api"]
+
+@lru_cache(maxsize=1)
+def get_erpnext_api():
+    """Get the shared ERPNextAPI instance"""
+    # Imported here because the ERPNext integration itself depends on src.utils
+    from src.erpnext_integration.api import ERPNextAPI
+    return ERPNextAPI()
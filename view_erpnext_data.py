@@ -8,45 +8,50 @@ import os
 import json
 from datetime import datetime, timedelta
 
+import numpy as np
+
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from erpnext_integration.api import ERPNextAPI
 
-def print_separator(title):
-    """Print a section separator"""
-    print("\n" + "="*50)
-    print(f" {title}")
-    print("="*50)
+# Contract count from which alerts are sorted with NumPy instead of list.sort
+NUMPY_SORT_THRESHOLD = 1000
+
+def format_separator(title):
+    """Format a section separator"""
+    return ["\n" + "="*50, f" {title}", "="*50]
 
-def print_clients(api):
-    """Print all clients"""
-    print_separator("CLIENTS")
+def format_clients(api):
+    """Format all clients as report lines"""
+    lines = format_separator("CLIENTS")
     
     try:
         clients = api.get_clients()
         
         if not clients:
-            print("No clients found.")
-            return
+            lines.append("No clients found.")
+            return lines
         
-        print(f"Found {len(clients)} client(s):\n")
+        lines.append(f"Found {len(clients)} client(s):\n")
         
         for i, client in enumerate(clients, 1):
-            print(f"{i}. Client ID: {client.get('client_id', 'N/A')}")
-            print(f"   Name: {client.get('client_name', 'N/A')}")
-            print(f"   Aliases: {', '.join(client.get('client_aliases', [])) if client.get('client_aliases') else 'None'}")
-            print(f"   Industry: {client.get('industry', 'N/A')}")
-            print(f"   Status: {client.get('status', 'N/A')}")
-            print(f"   Created: {client.get('created_date', 'N/A')}")
-            print()
+            lines.append(f"{i}. Client ID: {client.get('client_id', 'N/A')}")
+            lines.append(f"   Name: {client.get('client_name', 'N/A')}")
+            lines.append(f"   Aliases: {', '.join(client.get('client_aliases', [])) if client.get('client_aliases') else 'None'}")
+            lines.append(f"   Industry: {client.get('industry', 'N/A')}")
+            lines.append(f"   Status: {client.get('status', 'N/A')}")
+            lines.append(f"   Created: {client.get('created_date', 'N/A')}")
+            lines.append("")
             
     except Exception as e:
-        print(f"Error retrieving clients: {e}")
+        lines.append(f"Error retrieving clients: {e}")
+    
+    return lines
 
-def print_contracts(api):
-    """Print all contracts"""
-    print_separator("CONTRACTS")
+def format_contracts(api):
+    """Format all contracts as report lines"""
+    lines = format_separator("CONTRACTS")
     
     try:
         # Get all contracts by using a very large date range
@@ -54,56 +59,68 @@ def print_contracts(api):
         contracts = api.get_expiring_contracts(days_ahead=3650)
         
         if not contracts:
-            print("No contracts found.")
-            return
+            lines.append("No contracts found.")
+            return lines
         
-        print(f"Found {len(contracts)} contract(s):\n")
+        lines.append(f"Found {len(contracts)} contract(s):\n")
         
         for i, contract in enumerate(contracts, 1):
-            print(f"{i}. Contract ID: {contract.get('contract_id', 'N/A')}")
-            print(f"   Client ID: {contract.get('client_id', 'N/A')}")
-            print(f"   Type: {contract.get('contract_type', 'N/A')}")
-            print(f"   Name: {contract.get('contract_name', 'N/A')}")
-            print(f"   Effective Date: {contract.get('effective_date', 'N/A')}")
-            print(f"   Expiration Date: {contract.get('expiration_date', 'N/A')}")
-            print(f"   Days Until Expiration: {contract.get('days_until_expiration', 'N/A')}")
-            print(f"   Auto Renewal: {contract.get('auto_renewal', 'N/A')}")
-            print()
+            lines.append(f"{i}. Contract ID: {contract.get('contract_id', 'N/A')}")
+            lines.append(f"   Client ID: {contract.get('client_id', 'N/A')}")
+            lines.append(f"   Type: {contract.get('contract_type', 'N/A')}")
+            lines.append(f"   Name: {contract.get('contract_name', 'N/A')}")
+            lines.append(f"   Effective Date: {contract.get('effective_date', 'N/A')}")
+            lines.append(f"   Expiration Date: {contract.get('expiration_date', 'N/A')}")
+            lines.append(f"   Days Until Expiration: {contract.get('days_until_expiration', 'N/A')}")
+            lines.append(f"   Auto Renewal: {contract.get('auto_renewal', 'N/A')}")
+            lines.append("")
             
     except Exception as e:
-        print(f"Error retrieving contracts: {e}")
+        lines.append(f"Error retrieving contracts: {e}")
+    
+    return lines
 
-def print_alerts(api):
-    """Print alerts for expiring contracts"""
-    print_separator("ALERTS - CONTRACTS EXPIRING IN 90 DAYS")
+def format_alerts(api):
+    """Format alerts for expiring contracts as report lines"""
+    lines = format_separator("ALERTS - CONTRACTS EXPIRING IN 90 DAYS")
     
     try:
         expiring_contracts = api.get_expiring_contracts(days_ahead=90)
         
         if not expiring_contracts:
-            print("No contracts expiring in the next 90 days.")
-            return
+            lines.append("No contracts expiring in the next 90 days.")
+            return lines
         
-        print(f"Found {len(expiring_contracts)} contract(s) expiring soon:\n")
+        lines.append(f"Found {len(expiring_contracts)} contract(s) expiring soon:\n")
         
         # Sort by days until expiration
-        expiring_contracts.sort(key=lambda x: x.get('days_until_expiration', 999))
+        if len(expiring_contracts) >= NUMPY_SORT_THRESHOLD:
+            days = np.array(
+                [c.get('days_until_expiration') for c in expiring_contracts], dtype=float
+            )
+            days[np.isnan(days)] = 999
+            order = np.argsort(days, kind='stable')
+            expiring_contracts = [expiring_contracts[i] for i in order]
+        else:
+            expiring_contracts.sort(key=lambda x: x.get('days_until_expiration', 999))
         
         for i, contract in enumerate(expiring_contracts, 1):
             days_left = contract.get('days_until_expiration', 'N/A')
             urgency = "🔴 URGENT" if isinstance(days_left, int) and days_left <= 30 else "🟡 WARNING"
             
-            print(f"{i}. {urgency}")
-            print(f"   Contract ID: {contract.get('contract_id', 'N/A')}")
-            print(f"   Client ID: {contract.get('client_id', 'N/A')}")
-            print(f"   Type: {contract.get('contract_type', 'N/A')}")
-            print(f"   Expiration Date: {contract.get('expiration_date', 'N/A')}")
-            print(f"   Days Left: {days_left}")
-            print(f"   Auto Renewal: {'Yes' if contract.get('auto_renewal') else 'No'}")
-            print()
+            lines.append(f"{i}. {urgency}")
+            lines.append(f"   Contract ID: {contract.get('contract_id', 'N/A')}")
+            lines.append(f"   Client ID: {contract.get('client_id', 'N/A')}")
+            lines.append(f"   Type: {contract.get('contract_type', 'N/A')}")
+            lines.append(f"   Expiration Date: {contract.get('expiration_date', 'N/A')}")
+            lines.append(f"   Days Left: {days_left}")
+            lines.append(f"   Auto Renewal: {'Yes' if contract.get('auto_renewal') else 'No'}")
+            lines.append("")
             
     except Exception as e:
-        print(f"Error retrieving expiring contracts: {e}")
+        lines.append(f"Error retrieving expiring contracts: {e}")
+    
+    return lines
 
 def main():
     """Main function"""
@@ -118,14 +135,14 @@ def main():
         print(f"Error connecting to ERPNext: {e}")
         return
     
-    # Print all data
-    print_clients(api)
-    print_contracts(api)
-    print_alerts(api)
+    # Build the whole report first and write it in one go; printing line by
+    # line is slow for thousands of records
+    lines = format_clients(api) + format_contracts(api) + format_alerts(api)
+    lines += format_separator("SUMMARY")
+    lines.append("Data retrieval completed!")
+    lines.append("\nTip: If you see errors, check the erpnext_logs/ folder for detailed API logs.")
     
-    print_separator("SUMMARY")
-    print("Data retrieval completed!")
-    print("\nTip: If you see errors, check the erpnext_logs/ folder for detailed API logs.")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file